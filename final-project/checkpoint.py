@@ -0,0 +1,64 @@
+"""Checkpoint and resume support for long simulation runs.
+
+A checkpoint is a deep copy of everything needed to continue a run
+bit-exactly: the simulation's attributes (road, velocities, vehicle types,
+statistics histories and its random number generator), the analyzer
+metrics and the step counter. Taking the copy is the only work done in
+the step loop; pickling and writing happen in a background thread, and the
+file is replaced atomically so a crash mid-write never leaves a broken
+checkpoint behind.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import os
+import pickle
+
+def simulation_state(simulation):
+    """Attributes of a simulation, without per-instance hooks such as recorders"""
+    return {name: value for name, value in vars(simulation).items()
+            if not callable(value)}
+
+def restore_simulation(simulation, state):
+    """Overwrite a freshly created simulation with a saved state"""
+    vars(simulation).update(state)
+    return simulation
+
+def write_checkpoint(filename, state):
+    """Pickle ``state`` next to ``filename`` and move it into place"""
+    temporary = filename + '.tmp'
+    with open(temporary, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, filename)
+
+def load_checkpoint(filename):
+    """Read a checkpoint written by ``Checkpointer``"""
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
+
+class Checkpointer:
+    """Writes checkpoints every ``interval`` steps from a background thread"""
+
+    def __init__(self, filename, interval=500):
+        self.filename = filename
+        self.interval = interval
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._pending = None  # At most one write in flight
+
+    def due(self, step):
+        """Whether a checkpoint should be taken after ``step``"""
+        return self.interval > 0 and (step + 1) % self.interval == 0
+
+    def save(self, state, wait=False):
+        """Snapshot ``state`` now and write it asynchronously"""
+        snapshot = copy.deepcopy(state)
+        if self._pending is not None:
+            self._pending.result()
+        self._pending = self._pool.submit(write_checkpoint, self.filename, snapshot)
+        if wait:
+            self._pending.result()
+
+    def close(self):
+        """Wait for the last write to finish"""
+        if self._pending is not None:
+            self._pending.result()
+        self._pool.shutdown()
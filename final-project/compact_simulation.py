@@ -0,0 +1,298 @@
+import numpy as np
+from gap_simulation import sample_positions
+from traffic_simulation import (build_vehicle_properties, draw_vehicle_types,
+                                initial_vehicle_types, vehicle_parameter_tables,
+                                vehicle_type_shares, window_bounds)
+
+EMPTY = -1  # Cell value of an empty cell
+
+class CompactTrafficSimulation:
+    """NaSch model with one signed byte of state per cell.
+
+    ``cells`` holds the velocity of the car in each cell, or ``EMPTY``.
+    Mixed traffic adds a parallel int8 array of type codes and car IDs are
+    only kept when ``track_ids`` is set, so a 10^8-cell ring costs about
+    100 MB. Cars are moved in place; no road-sized list or dict is built.
+    Analysis and visualization read the state through ``vehicle_arrays()``.
+    """
+
+    draws_per_vehicle = 2  # Uniforms per vehicle and step: slowdown, exit
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow,
+                 boundary_type, alpha, beta, track_ids=False, seed=None):
+        if max_velocity > np.iinfo(np.int8).max:
+            raise ValueError("max_velocity must fit in a signed byte")
+        self.rng = np.random.default_rng(seed)
+        self.road_length = road_length
+        self.cells = np.full(road_length, EMPTY, dtype=np.int8)
+        self.cell_ids = np.zeros(road_length, dtype=np.int64) if track_ids else None
+        self.max_velocity = max_velocity
+        self.p_slow = p_slow
+        self.boundary_type = boundary_type
+        self.alpha = alpha
+        self.beta = beta
+        self.next_car_id = 1
+        self._sorted = None  # Positions and velocities, once per step
+        self.exited = None  # Velocities and payloads of the cars that left last step
+
+        # Running totals, refreshed on every update
+        self.vehicle_count = 0
+        self.speed_sum = 0
+
+        # Initialize cars
+        if boundary_type == 'closed':
+            positions = sample_positions(road_length, num_cars, self.rng)
+            self.cells[positions] = self.rng.integers(
+                0, max_velocity + 1, size=num_cars)
+            self._assign_ids(positions)
+        self._refresh_totals()
+
+        # Track statistics
+        self.flow_history = []
+        self.density_history = []
+
+    def _assign_ids(self, positions):
+        """Give fresh IDs to cars placed at ``positions`` when tracking IDs"""
+        if self.cell_ids is not None:
+            self.cell_ids[positions] = np.arange(
+                self.next_car_id, self.next_car_id + len(positions))
+        self.next_car_id += len(positions)
+
+    def _refresh_totals(self):
+        """Recount vehicles and the sum of their velocities"""
+        self._sorted = None
+        _, velocities = self.vehicle_arrays()
+        self.vehicle_count = len(velocities)
+        self.speed_sum = int(velocities.sum())
+
+    def _payload_arrays(self):
+        """Per-cell arrays that travel with the cars"""
+        return [] if self.cell_ids is None else [self.cell_ids]
+
+    def vehicle_arrays(self):
+        """Return positions (ascending) and velocities of all cars"""
+        if self._sorted is None:
+            positions = np.flatnonzero(self.cells >= 0)
+            self._sorted = positions, self.cells[positions]
+        return self._sorted
+
+    def get_gaps(self, positions):
+        """Number of empty cells in front of each car"""
+        gaps = np.empty_like(positions)
+        if len(positions) == 0:
+            return gaps
+        gaps[:-1] = positions[1:] - positions[:-1] - 1
+
+        if self.boundary_type == 'open':
+            # Leading car only sees the end of the road
+            last = positions[-1]
+            gaps[-1] = self.road_length - last - 1 if last < self.road_length - 1 \
+                else self.road_length - 1
+        else:  # periodic boundary
+            gaps[-1] = (positions[0] - positions[-1] - 1) % self.road_length
+        return gaps
+
+    def get_slowdown_probabilities(self, velocities):
+        """Slowdown probability per car (overridden in VDR model)"""
+        return self.p_slow
+
+    def accelerate(self, velocities, positions, draws):
+        """Step 1: Acceleration"""
+        return np.minimum(velocities + 1, self.max_velocity)
+
+    def randomize(self, v, velocities, positions, draws):
+        """Step 3: Randomization (uses the velocities of the previous step)"""
+        slow_down = draws[0] < self.get_slowdown_probabilities(velocities)
+        return np.maximum(0, v - slow_down)
+
+    def enter_vehicle(self, draw):
+        """Place a new car on the first cell"""
+        self.cells[0] = 0
+        self._assign_ids(np.array([0]))
+
+    def insert_vehicle(self, velocity, payload=()):
+        """Place a car coming from another road on the empty first cell"""
+        self.cells[0] = velocity
+        for array, value in zip(self._payload_arrays(), payload):
+            array[0] = value
+        self.vehicle_count += 1
+        self.speed_sum += int(velocity)
+        self._sorted = None
+
+    def get_window_density(self, start, end):
+        """Density over cells [start, end) by binary search in the sorted positions"""
+        positions, _ = self.vehicle_arrays()
+        counts = np.searchsorted(positions, end) - np.searchsorted(positions, start)
+        return counts / (np.asarray(end) - np.asarray(start))
+
+    def get_density_profile(self, window_size):
+        """Calculate density profile along the road"""
+        return self.get_window_density(*window_bounds(self.road_length, window_size))
+
+    def update(self):
+        """Update simulation state"""
+        positions, previous = self.vehicle_arrays()
+        previous = previous.astype(np.int64)
+        gaps = self.get_gaps(positions)
+        entrance_free = self.cells[0] == EMPTY
+
+        # All uniforms of the step in one call: one row per kind of draw,
+        # then entrance and vehicle type
+        uniforms = self.rng.random(self.draws_per_vehicle * len(positions) + 2)
+        draws = uniforms[:-2].reshape(self.draws_per_vehicle, len(positions))
+
+        v = self.accelerate(previous, positions, draws)
+
+        # Step 2: Deceleration
+        v = np.minimum(v, gaps)
+
+        v = self.randomize(v, previous, positions, draws)
+
+        # Step 4: Movement
+        new_positions = positions + v
+        keep = slice(None)
+
+        if self.boundary_type == 'open':
+            at_exit = new_positions >= self.road_length - 1
+            leaves = at_exit & (draws[1] < self.beta)
+            self.exited = v[leaves], [array[positions][leaves]
+                                      for array in self._payload_arrays()]
+            # Cars that reach the exit but do not leave stay where they are
+            new_positions = np.where(at_exit, positions, new_positions)
+            keep = ~leaves
+            new_positions, v = new_positions[keep], v[keep]
+        else:  # periodic boundary
+            new_positions %= self.road_length
+
+        payloads = [(array, array[positions][keep]) for array in self._payload_arrays()]
+        self.cells[positions] = EMPTY
+        self.cells[new_positions] = v
+        for array, values in payloads:
+            array[new_positions] = values
+
+        self.vehicle_count = len(v)
+        self.speed_sum = int(v.sum())
+
+        # Handle entrance for open boundary
+        if self.boundary_type == 'open' and entrance_free:
+            if uniforms[-2] < self.alpha:
+                self.enter_vehicle(uniforms[-1])
+                self.vehicle_count += 1
+        self._sorted = None
+
+        # Update statistics
+        self.update_statistics()
+
+    def update_statistics(self):
+        """Update flow and density history"""
+        self.flow_history.append(self.get_current_flow())
+        self.density_history.append(self.get_current_density())
+
+    def get_current_density(self):
+        """Calculate current traffic density"""
+        return self.vehicle_count / self.road_length
+
+    def get_current_flow(self):
+        """Calculate current traffic flow"""
+        return self.speed_sum / self.road_length
+
+    def get_state(self):
+        """Return current state: velocity cells and per-cell type codes (or None)"""
+        return self.cells, None
+
+
+class CompactVDRTrafficSimulation(CompactTrafficSimulation):
+    """VDR extension of the compact traffic simulation"""
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow, p0_slow,
+                 boundary_type, alpha, beta, track_ids=False, seed=None):
+        super().__init__(road_length, num_cars, max_velocity, p_slow,
+                        boundary_type, alpha, beta, track_ids, seed)
+        self.p0_slow = p0_slow  # Additional slowdown probability for stopped cars
+
+    def get_slowdown_probabilities(self, velocities):
+        """Override to implement VDR behavior"""
+        return np.where(velocities == 0, self.p0_slow, self.p_slow)
+
+
+class CompactMixedVDRTrafficSimulation(CompactVDRTrafficSimulation):
+    """Mixed traffic VDR model on the compact state.
+
+    Vehicle types are stored as int8 codes (positions in
+    ``VEHICLE_TYPE_CODES``) in ``cell_types``; per-type parameters are read
+    from arrays indexed by those codes.
+    """
+
+    draws_per_vehicle = 3  # Slowdown, exit and recovery from a stop
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow, p0_slow,
+                 boundary_type='periodic', alpha=0.3, beta=0.3,
+                 truck_ratio=0.15, track_ids=False, seed=None, vehicle_mix=None):
+        self.cell_types = np.zeros(road_length, dtype=np.int8)
+        # No single-type cars; ``_initialize_mixed_vehicles`` places the vehicles
+        super().__init__(road_length, 0, max_velocity, p_slow, p0_slow,
+                        boundary_type, alpha, beta, track_ids, seed)
+        self.truck_ratio = truck_ratio
+        self.type_shares = vehicle_type_shares(truck_ratio, vehicle_mix)
+        self.num_vehicles = int(num_cars * 0.7)
+        self.vehicle_properties = build_vehicle_properties(max_velocity, p_slow, p0_slow)
+        self.type_tables = vehicle_parameter_tables(self.vehicle_properties)
+
+        self._initialize_mixed_vehicles()
+
+    def _initialize_mixed_vehicles(self):
+        """Initialize vehicles with mixed types on evenly spaced cells"""
+        self.cells[:] = EMPTY
+        self.next_car_id = 1
+
+        min_spacing = max(3, self.road_length // max(1, self.num_vehicles * 2))
+        available_positions = np.arange(0, self.road_length - min_spacing, min_spacing)
+        self.num_vehicles = min(self.num_vehicles, len(available_positions))
+
+        positions = self.rng.permutation(available_positions)[:self.num_vehicles]
+        self.cells[positions] = 1  # Start vehicles with minimal velocity
+        self.cell_types[positions] = initial_vehicle_types(self.num_vehicles, self.type_shares)
+        self._assign_ids(positions)
+        self._refresh_totals()
+
+    def place_random_vehicles(self, num_vehicles):
+        """Replace the vehicles with ``num_vehicles`` on random distinct cells, with
+        types drawn from the type shares; unlike the evenly spaced start this
+        reaches any density"""
+        self.cells[:] = EMPTY
+        self.next_car_id = 1
+
+        positions = sample_positions(self.road_length, num_vehicles, self.rng)
+        self.cells[positions] = 1  # Start vehicles with minimal velocity
+        self.cell_types[positions] = draw_vehicle_types(self.rng.random(num_vehicles),
+                                                        self.type_shares)
+        self.num_vehicles = num_vehicles
+        self._assign_ids(positions)
+        self._refresh_totals()
+
+    def _payload_arrays(self):
+        """Per-cell arrays that travel with the vehicles"""
+        return [self.cell_types] + super()._payload_arrays()
+
+    def accelerate(self, velocities, positions, draws):
+        """Step 1: Acceleration with recovery for stopped vehicles"""
+        types = self.cell_types[positions]
+        recovered = draws[2] < self.type_tables['recovery_rate'][types]
+        moving = np.minimum(velocities + self.type_tables['acceleration'][types],
+                            self.type_tables['max_velocity'][types])
+        return np.where(velocities == 0, recovered, moving).astype(np.int64)
+
+    def randomize(self, v, velocities, positions, draws):
+        """Step 3: Randomization, only moving vehicles slow down"""
+        types = self.cell_types[positions]
+        slow_down = (v > 0) & (draws[0] < self.type_tables['p_slow'][types])
+        return v - slow_down
+
+    def enter_vehicle(self, draw):
+        """Place a new vehicle of random type on the first cell"""
+        self.cell_types[0] = draw_vehicle_types(draw, self.type_shares)
+        super().enter_vehicle(draw)
+
+    def get_state(self):
+        """Return current state: velocity cells and per-cell type codes"""
+        return self.cells, self.cell_types
@@ -0,0 +1,248 @@
+"""Ring road split into chunks that are updated by separate processes.
+
+The road lives in ``multiprocessing.shared_memory`` as two int8 buffers of
+velocities (``EMPTY`` for empty cells), read and written on alternate
+steps. Every worker owns one contiguous chunk and only ever writes its own
+cells. Cars that cross into the next chunk are written to that chunk's
+inbox of ``max_velocity`` cells instead, and the owner merges them at the
+start of the next step. To compute gaps a worker reads the first
+``max_velocity`` cells after its chunk (plus the inbox it filled itself):
+this halo is all the state that is exchanged between chunks. Since nobody
+reads a buffer while it is being written, one barrier per step is enough.
+
+Every worker draws from its own seed stream, so a run is a statistically
+identical realization of the single-process model, not a bit-identical one.
+"""
+from multiprocessing import shared_memory
+import multiprocessing
+import weakref
+import numpy as np
+from gap_simulation import sample_positions
+from traffic_simulation import occupancy_prefix, window_bounds, window_densities
+
+EMPTY = -1  # Cell value of an empty cell
+
+def attach_arrays(names, shapes, dtypes):
+    """Open shared memory blocks by name and view them as arrays"""
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    arrays = [np.ndarray(shape, dtype=dtype, buffer=block.buf)
+              for block, shape, dtype in zip(blocks, shapes, dtypes)]
+    return blocks, arrays
+
+def update_chunk(road, inboxes, stats, worker, bounds, step, params, rng):
+    """Advance the cars of one chunk by one step"""
+    max_velocity, p_slow, p0_slow = params
+    start, end = bounds[worker], bounds[worker + 1]
+    following = (worker + 1) % (len(bounds) - 1)
+    current, following_buffer = step % 2, (step + 1) % 2
+
+    # Own cells plus the cars that crossed into the chunk last step
+    cells = road[current, start:end].copy()
+    incoming = inboxes[current, worker]
+    arrived = incoming >= 0
+    cells[:max_velocity][arrived] = incoming[arrived]
+
+    # Halo: the first cells of the next chunk and the cars just sent there
+    halo = ((road[current, bounds[following]:bounds[following] + max_velocity] >= 0)
+            | (inboxes[current, following] >= 0))
+
+    positions = np.flatnonzero(cells >= 0)
+    velocities = cells[positions].astype(np.int64)
+    ahead = np.concatenate([positions, len(cells) + np.flatnonzero(halo),
+                            [len(cells) + max_velocity]])
+    gaps = np.minimum(ahead[1:len(positions) + 1] - positions - 1, max_velocity)
+
+    # Step 1: Acceleration
+    v = np.minimum(velocities + 1, max_velocity)
+
+    # Step 2: Deceleration
+    v = np.minimum(v, gaps)
+
+    # Step 3: Randomization (uses the velocities of the previous step)
+    p = np.where(velocities == 0, p0_slow, p_slow)
+    v = np.maximum(0, v - (rng.random(len(v)) < p))
+
+    # Step 4: Movement, cars leaving the chunk go to the next chunk's inbox
+    new_positions = positions + v
+    stays = new_positions < len(cells)
+    own = road[following_buffer, start:end]
+    own[:] = EMPTY
+    own[new_positions[stays]] = v[stays]
+    outgoing = inboxes[following_buffer, following]
+    outgoing[:] = EMPTY
+    outgoing[new_positions[~stays] - len(cells)] = v[~stays]
+
+    stats[step % len(stats), worker] = len(v), v.sum()
+
+def chunk_worker(names, shapes, dtypes, worker, bounds, params, seed, step_barrier,
+                 control_barrier):
+    """Run batches of steps on one chunk until a batch of 0 steps is requested"""
+    blocks, (road, inboxes, stats, control) = attach_arrays(names, shapes, dtypes)
+    rng = np.random.default_rng(seed)
+    step = 0
+    while True:
+        control_barrier.wait()  # Start of a batch
+        steps = int(control[0])
+        if steps == 0:
+            break
+        for _ in range(steps):
+            update_chunk(road, inboxes, stats, worker, bounds, step, params, rng)
+            step += 1
+            step_barrier.wait()
+        control_barrier.wait()  # End of the batch
+    del road, inboxes, stats, control
+    for block in blocks:
+        block.close()
+
+def shutdown(processes, control_block, control_barrier, blocks):
+    """Stop the workers and release the shared memory"""
+    if processes:
+        np.ndarray((1,), dtype=np.int64, buffer=control_block.buf)[0] = 0
+        control_barrier.wait()
+        for process in processes:
+            process.join()
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+class DecomposedTrafficSimulation:
+    """NaSch model on a periodic road split across ``workers`` processes.
+
+    The interface matches the other array engines: ``update()`` advances one
+    step, ``run(steps)`` advances many with one round of synchronization
+    with the main process per ``batch_size`` steps. Between calls the
+    workers are idle and the shared road can be read directly.
+    """
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow, workers=None,
+                 batch_size=1000, seed=None):
+        workers = workers or multiprocessing.cpu_count()
+        if road_length // workers < max_velocity + 1:
+            raise ValueError("Every chunk must be longer than max_velocity")
+        if max_velocity > np.iinfo(np.int8).max:
+            raise ValueError("max_velocity must fit in a signed byte")
+        seeds = np.random.SeedSequence(seed).spawn(workers + 1)
+        self.rng = np.random.default_rng(seeds[-1])  # Initial placement only
+        self.road_length = road_length
+        self.max_velocity = max_velocity
+        self.p_slow = p_slow
+        self.p0_slow = p_slow
+        self.boundary_type = 'periodic'
+        self.num_workers = workers
+        self.batch_size = batch_size
+        self.bounds = np.linspace(0, road_length, workers + 1).astype(np.int64)
+        self.step = 0
+
+        # Shared state: road buffers, inboxes, per-step totals and control word
+        shapes = [(2, road_length), (2, workers, max_velocity), (batch_size, workers, 2), (1,)]
+        dtypes = [np.int8, np.int8, np.int64, np.int64]
+        self._blocks = [shared_memory.SharedMemory(
+            create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+            for shape, dtype in zip(shapes, dtypes)]
+        self._layout = ([block.name for block in self._blocks], shapes, dtypes)
+        self.road, self.inboxes, self._stats, self._control = [
+            np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            for block, shape, dtype in zip(self._blocks, shapes, dtypes)]
+        self.road[:] = EMPTY
+        self.inboxes[:] = EMPTY
+
+        # Initialize cars
+        positions = sample_positions(road_length, num_cars, self.rng)
+        self.road[0, positions] = self.rng.integers(0, max_velocity + 1, size=num_cars)
+
+        self._seeds = seeds[:-1]
+        self._processes = []
+        self._step_barrier = multiprocessing.Barrier(workers)
+        self._control_barrier = multiprocessing.Barrier(workers + 1)
+        self._finalizer = weakref.finalize(self, shutdown, self._processes, self._blocks[-1],
+                                           self._control_barrier, self._blocks)
+
+        # Track statistics
+        self.flow_history = []
+        self.density_history = []
+
+    def _start_workers(self):
+        """Spawn one process per chunk on first use"""
+        params = (self.max_velocity, self.p_slow, self.p0_slow)
+        for worker, seed in enumerate(self._seeds):
+            process = multiprocessing.Process(
+                target=chunk_worker, daemon=True,
+                args=(*self._layout, worker, self.bounds, params, seed, self._step_barrier,
+                      self._control_barrier))
+            process.start()
+            self._processes.append(process)
+
+    def run(self, steps):
+        """Advance the simulation by ``steps`` steps"""
+        if not self._processes:
+            self._start_workers()
+        while steps > 0:
+            batch = min(steps, self.batch_size)
+            self._control[0] = batch
+            self._control_barrier.wait()  # Workers start the batch
+            self._control_barrier.wait()  # and finish it
+            totals = self._stats[np.arange(self.step, self.step + batch) % self.batch_size]
+            counts, speed_sums = totals.sum(axis=1).T
+            self.density_history.extend((counts / self.road_length).tolist())
+            self.flow_history.extend((speed_sums / self.road_length).tolist())
+            self.step += batch
+            steps -= batch
+
+    def update(self):
+        """Update simulation state"""
+        self.run(1)
+
+    def get_cells(self):
+        """Velocity per cell of the current state, or ``EMPTY``"""
+        cells = self.road[self.step % 2].copy()
+        for worker, inbox in enumerate(self.inboxes[self.step % 2]):
+            arrived = np.flatnonzero(inbox >= 0)
+            cells[self.bounds[worker] + arrived] = inbox[arrived]
+        return cells
+
+    def vehicle_arrays(self):
+        """Return positions (ascending) and velocities of all cars"""
+        cells = self.get_cells()
+        positions = np.flatnonzero(cells >= 0)
+        return positions, cells[positions].astype(np.int64)
+
+    def get_window_density(self, start, end):
+        """Density over cells [start, end); accepts arrays for many windows"""
+        return window_densities(occupancy_prefix(self.get_cells() >= 0), start, end)
+
+    def get_density_profile(self, window_size):
+        """Calculate density profile along the road"""
+        return self.get_window_density(*window_bounds(self.road_length, window_size))
+
+    def get_current_density(self):
+        """Calculate current traffic density"""
+        return np.count_nonzero(self.get_cells() >= 0) / self.road_length
+
+    def get_current_flow(self):
+        """Calculate current traffic flow"""
+        return int(np.maximum(self.get_cells(), 0).sum(dtype=np.int64)) / self.road_length
+
+    def get_state(self):
+        """Return current state: velocity cells and type codes (None)"""
+        return self.get_cells(), None
+
+    def close(self):
+        """Stop the workers and free the shared memory; the road is gone afterwards"""
+        del self.road, self.inboxes, self._stats, self._control
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DecomposedVDRTrafficSimulation(DecomposedTrafficSimulation):
+    """VDR extension of the decomposed traffic simulation"""
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow, p0_slow, workers=None,
+                 batch_size=1000, seed=None):
+        super().__init__(road_length, num_cars, max_velocity, p_slow, workers,
+                        batch_size, seed)
+        self.p0_slow = p0_slow  # Additional slowdown probability for stopped cars
@@ -0,0 +1,165 @@
+import numpy as np
+
+def gaps_ahead(occupied, boundary_type):
+    """Empty cells in front of every cell of each row of a (rows x cells) road"""
+    road_length = occupied.shape[1]
+    cells = np.arange(road_length)
+    none = 2 * road_length
+    index = np.where(occupied, cells, none)
+
+    # Smallest occupied index at or after each cell
+    next_incl = np.minimum.accumulate(index[:, ::-1], axis=1)[:, ::-1]
+    next_car = np.full_like(next_incl, none)
+    next_car[:, :-1] = next_incl[:, 1:]
+
+    no_leader = next_car == none
+    if boundary_type == 'open':
+        # Leading car only sees the end of the road
+        end = np.where(cells < road_length - 1, road_length, 2 * road_length - 1)
+        next_car = np.where(no_leader, np.broadcast_to(end, next_car.shape), next_car)
+    else:  # periodic boundary, wrap to the first car of the row
+        next_car = np.where(no_leader, next_incl[:, :1] + road_length, next_car)
+    return next_car - cells - 1
+
+def gaps_behind(occupied, boundary_type):
+    """Empty cells behind every cell of each row, up to the next car back"""
+    road_length = occupied.shape[1]
+    cells = np.arange(road_length)
+    none = -2 * road_length
+    index = np.where(occupied, cells, none)
+
+    # Largest occupied index at or before each cell
+    previous_incl = np.maximum.accumulate(index, axis=1)
+    previous_car = np.full_like(previous_incl, none)
+    previous_car[:, 1:] = previous_incl[:, :-1]
+
+    if boundary_type != 'open':
+        # Periodic boundary, wrap to the last car of the row
+        previous_car = np.where(previous_car == none,
+                                previous_incl[:, -1:] - road_length, previous_car)
+    return cells - previous_car - 1
+
+class EnsembleTrafficSimulation:
+    """Many independent NaSch replicas advanced by one update call.
+
+    ``road`` is a (replicas x cells) int8 array holding the velocity of the
+    car in each cell, or -1 for an empty cell. All replicas share the model
+    parameters and differ only in their random draws, so one step of the
+    whole ensemble is a fixed number of array operations and the Python
+    overhead is paid once per step instead of once per replica.
+    """
+
+    def __init__(self, num_replicas, road_length, num_cars, max_velocity, p_slow,
+                 boundary_type, alpha, beta, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.num_replicas = num_replicas
+        self.road_length = road_length
+        self.road = np.full((num_replicas, road_length), -1, dtype=np.int8)
+        self.max_velocity = max_velocity
+        self.p_slow = p_slow
+        self.boundary_type = boundary_type
+        self.alpha = alpha
+        self.beta = beta
+
+        # Initialize cars, an independent placement per replica
+        if boundary_type == 'closed':
+            order = np.argsort(self.rng.random((num_replicas, road_length)), axis=1)
+            positions = order[:, :num_cars]
+            rows = np.arange(num_replicas)[:, None]
+            self.road[rows, positions] = self.rng.integers(
+                0, max_velocity + 1, size=(num_replicas, num_cars))
+
+        # Track statistics, one array of per-replica values per step
+        self.flow_history = []
+        self.density_history = []
+
+    def get_gaps(self):
+        """Number of empty cells in front of every cell, per replica"""
+        return gaps_ahead(self.road >= 0, self.boundary_type)
+
+    def get_slowdown_probabilities(self, velocities):
+        """Slowdown probability per car (overridden in VDR model)"""
+        return self.p_slow
+
+    def update(self):
+        """Update all replicas"""
+        flat = np.flatnonzero(self.road >= 0)
+        rows, positions = np.divmod(flat, self.road_length)
+        previous = self.road.ravel()[flat].astype(np.int64)
+        gaps = self.get_gaps().ravel()[flat]
+
+        # All uniforms of the step in one call: slowdown and exit per car,
+        # then entrance per replica
+        draws = self.rng.random(2 * len(flat) + self.num_replicas)
+
+        # Step 1: Acceleration
+        v = np.minimum(previous + 1, self.max_velocity)
+
+        # Step 2: Deceleration
+        v = np.minimum(v, gaps)
+
+        # Step 3: Randomization (uses the velocities of the previous step)
+        slow_down = draws[:len(v)] < \
+            self.get_slowdown_probabilities(previous)
+        v = np.maximum(0, v - slow_down)
+
+        # Step 4: Movement
+        new_positions = positions + v
+
+        if self.boundary_type == 'open':
+            at_exit = new_positions >= self.road_length - 1
+            leaves = at_exit & (draws[len(v):2 * len(v)] < self.beta)
+            # Cars that reach the exit but do not leave stay where they are
+            new_positions = np.where(at_exit, positions, new_positions)
+            keep = ~leaves
+            rows, new_positions, v = rows[keep], new_positions[keep], v[keep]
+        else:  # periodic boundary
+            new_positions %= self.road_length
+
+        new_road = np.full_like(self.road, -1)
+        new_road[rows, new_positions] = v
+
+        # Handle entrance for open boundary
+        if self.boundary_type == 'open':
+            enters = (self.road[:, 0] < 0) & \
+                (draws[2 * len(flat):] < self.alpha)
+            new_road[enters, 0] = 0
+
+        self.road = new_road
+
+        # Update statistics
+        self.update_statistics()
+
+    def update_statistics(self):
+        """Update flow and density history"""
+        self.flow_history.append(self.get_current_flow())
+        self.density_history.append(self.get_current_density())
+
+    def get_current_density(self):
+        """Current traffic density of every replica"""
+        return np.count_nonzero(self.road >= 0, axis=1) / self.road_length
+
+    def get_current_flow(self):
+        """Current traffic flow of every replica"""
+        return np.maximum(self.road, 0).sum(axis=1, dtype=np.int64) / self.road_length
+
+    def get_replica_averages(self, warmup=0):
+        """Time-averaged flow and density of every replica"""
+        return {
+            'flow_rate': np.mean(self.flow_history[warmup:], axis=0),
+            'density': np.mean(self.density_history[warmup:], axis=0)
+        }
+
+
+class EnsembleVDRTrafficSimulation(EnsembleTrafficSimulation):
+    """VDR extension of the ensemble traffic simulation"""
+
+    def __init__(self, num_replicas, road_length, num_cars, max_velocity, p_slow,
+                 p0_slow, boundary_type, alpha, beta, seed=None):
+        super().__init__(num_replicas, road_length, num_cars, max_velocity, p_slow,
+                        boundary_type, alpha, beta, seed)
+        self.p0_slow = p0_slow  # Additional slowdown probability for stopped cars
+
+    def get_slowdown_probabilities(self, velocities):
+        """Override to implement VDR behavior"""
+        return np.where(velocities == 0, self.p0_slow, self.p_slow)
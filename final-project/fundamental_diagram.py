@@ -0,0 +1,170 @@
+"""Flow-vs-density (fundamental diagram) sweeps for periodic roads.
+
+Every (model, density) point runs in its own worker process with an
+independent seed stream spawned from one ``SeedSequence``. Warm-up steps
+are discarded and the mean flow is reported with a confidence interval
+over independent replicas.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import argparse
+import numpy as np
+import matplotlib.pyplot as plt
+from compact_simulation import CompactMixedVDRTrafficSimulation
+from ensemble_simulation import EnsembleTrafficSimulation, EnsembleVDRTrafficSimulation
+from traffic_analysis import TrafficAnalyzer, confidence_interval
+
+@dataclass
+class SweepConfig:
+    """Parameters shared by every point of a sweep"""
+    road_length: int = 1000
+    v_max: int = 5
+    p_slow: float = 0.4
+    p0_slow: float = 0.8
+    truck_ratio: float = 0.1
+    steps: int = 2000
+    warmup: int = 500
+    replicas: int = 8
+    confidence: float = 0.95
+
+@dataclass
+class FundamentalDiagram:
+    """Sweep result of one model, one entry per density point"""
+    model_type: str
+    densities: np.ndarray      # Measured mean density
+    flows: np.ndarray          # Mean flow over replicas
+    flow_ci: np.ndarray        # Confidence-interval half-width of the flow
+
+def run_density_point(model_type: str, density: float, config: SweepConfig,
+                      seed_sequence: np.random.SeedSequence) -> Dict[str, float]:
+    """Simulate all replicas of one density and summarize their flow"""
+    num_cars = int(round(density * config.road_length))
+
+    if model_type == 'mvdr':
+        # Random cells instead of the evenly spaced start, which caps the density at 1/3
+        replica_flows, replica_densities = [], []
+        for replica_seed in seed_sequence.spawn(config.replicas):
+            sim = CompactMixedVDRTrafficSimulation(
+                road_length=config.road_length,
+                num_cars=0,
+                max_velocity=config.v_max,
+                p_slow=config.p_slow,
+                p0_slow=config.p0_slow,
+                boundary_type='closed',
+                truck_ratio=config.truck_ratio,
+                seed=replica_seed
+            )
+            sim.place_random_vehicles(num_cars)
+            for _ in range(config.steps):
+                sim.update()
+            replica_flows.append(np.mean(sim.flow_history[config.warmup:]))
+            replica_densities.append(np.mean(sim.density_history[config.warmup:]))
+        averages = {'flow_rate': np.array(replica_flows),
+                    'density': np.array(replica_densities)}
+    else:
+        if model_type == 'vdr':
+            sim = EnsembleVDRTrafficSimulation(
+                config.replicas, config.road_length, num_cars, config.v_max,
+                config.p_slow, config.p0_slow, 'closed', 0, 0, seed_sequence)
+        else:
+            sim = EnsembleTrafficSimulation(
+                config.replicas, config.road_length, num_cars, config.v_max,
+                config.p_slow, 'closed', 0, 0, seed_sequence)
+        for _ in range(config.steps):
+            sim.update()
+        averages = sim.get_replica_averages(config.warmup)
+
+    flow, flow_ci = confidence_interval(averages['flow_rate'], config.confidence)
+    return {'density': float(np.mean(averages['density'])),
+            'flow': flow, 'flow_ci': flow_ci}
+
+def sweep_fundamental_diagram(model_types: List[str], densities,
+                              config: Optional[SweepConfig] = None,
+                              workers: Optional[int] = None,
+                              seed: Optional[int] = None) -> Dict[str, FundamentalDiagram]:
+    """Run every (model, density) point in a process pool"""
+    config = config or SweepConfig()
+    points = [(model_type, float(density))
+              for model_type in model_types for density in densities]
+    seeds = np.random.SeedSequence(seed).spawn(len(points))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_density_point, model_type, density, config, child)
+                   for (model_type, density), child in zip(points, seeds)]
+        results = [future.result() for future in futures]
+
+    diagrams = {}
+    for model_type in model_types:
+        rows = [r for (m, _), r in zip(points, results) if m == model_type]
+        diagrams[model_type] = FundamentalDiagram(
+            model_type=model_type,
+            densities=np.array([r['density'] for r in rows]),
+            flows=np.array([r['flow'] for r in rows]),
+            flow_ci=np.array([r['flow_ci'] for r in rows])
+        )
+    return diagrams
+
+def plot_fundamental_diagram(diagrams: Dict[str, FundamentalDiagram],
+                             filename: str = 'fundamental_diagram.png'):
+    """Plot flow against density with confidence-interval error bars"""
+    analyzer = TrafficAnalyzer()
+    plt.figure(figsize=(10, 6))
+    for model_type, diagram in diagrams.items():
+        plt.errorbar(diagram.densities, diagram.flows, yerr=diagram.flow_ci,
+                     marker='o', markersize=4, capsize=3,
+                     label=analyzer.model_names[model_type],
+                     color=analyzer.plot_colors[model_type])
+    analyzer._setup_plot("Fundamental Diagram", "Density", "Flow")
+    plt.savefig(filename, dpi=300, bbox_inches='tight')
+    print(f"\nFundamental diagram saved as {filename}")
+    plt.close()
+
+def parse_grid(spec: str) -> np.ndarray:
+    """Parse ``start:stop:step`` or a comma-separated list of values"""
+    if ':' in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        return np.round(np.arange(start, stop + step / 2, step), 6)
+    return np.array([float(x) for x in spec.split(',')])
+
+def main():
+    """Command-line entry point"""
+    defaults = SweepConfig()
+    parser = argparse.ArgumentParser(description="Fundamental diagram sweep on a periodic road")
+    parser.add_argument('--models', nargs='+', default=['basic', 'vdr', 'mvdr'],
+                        choices=['basic', 'vdr', 'mvdr'])
+    parser.add_argument('--densities', default='0.05:0.9:0.05',
+                        help="start:stop:step or comma-separated values")
+    parser.add_argument('--road-length', type=int, default=defaults.road_length)
+    parser.add_argument('--v-max', type=int, default=defaults.v_max)
+    parser.add_argument('--p-slow', type=float, default=defaults.p_slow)
+    parser.add_argument('--p0-slow', type=float, default=defaults.p0_slow)
+    parser.add_argument('--truck-ratio', type=float, default=defaults.truck_ratio)
+    parser.add_argument('--steps', type=int, default=defaults.steps)
+    parser.add_argument('--warmup', type=int, default=defaults.warmup)
+    parser.add_argument('--replicas', type=int, default=defaults.replicas)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default='fundamental_diagram.png')
+    args = parser.parse_args()
+
+    config = SweepConfig(
+        road_length=args.road_length,
+        v_max=args.v_max,
+        p_slow=args.p_slow,
+        p0_slow=args.p0_slow,
+        truck_ratio=args.truck_ratio,
+        steps=args.steps,
+        warmup=args.warmup,
+        replicas=args.replicas
+    )
+    diagrams = sweep_fundamental_diagram(args.models, parse_grid(args.densities),
+                                         config, args.workers, args.seed)
+    for diagram in diagrams.values():
+        print(f"\n{diagram.model_type.upper()}:")
+        for density, flow, ci in zip(diagram.densities, diagram.flows, diagram.flow_ci):
+            print(f"density {density:.3f}  flow {flow:.4f} ± {ci:.4f}")
+    plot_fundamental_diagram(diagrams, args.output)
+
+if __name__ == "__main__":
+    main()
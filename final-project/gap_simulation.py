@@ -0,0 +1,281 @@
+import numpy as np
+from traffic_simulation import (build_vehicle_properties, initial_vehicle_types,
+                                vehicle_parameter_tables, vehicle_type_shares, window_bounds)
+from vehicle_types import VEHICLE_TYPE_CODES
+
+def sample_positions(road_length, num_cars, rng):
+    """Draw distinct sorted positions without materializing the road"""
+    if num_cars > road_length:
+        raise ValueError("num_cars cannot exceed road_length")
+    if num_cars * 2 > road_length:
+        return np.sort(rng.choice(road_length, num_cars, replace=False))
+
+    positions = np.unique(rng.integers(0, road_length, size=num_cars))
+    while len(positions) < num_cars:
+        extra = rng.integers(0, road_length, size=num_cars - len(positions))
+        positions = np.unique(np.concatenate([positions, extra]))
+    return positions
+
+class GapTrafficSimulation:
+    """Vehicle-centric NaSch model for periodic (ring) roads.
+
+    The state is one entry per vehicle: its position, kept in ring order,
+    and the number of empty cells up to its leader. Vehicles never overtake,
+    so a step only has to update the gaps from the velocities of each car
+    and its leader. Every step costs O(number of vehicles), independent of
+    the road length, which makes long sparse rings cheap to simulate.
+    """
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.road_length = road_length
+        self.max_velocity = max_velocity
+        self.p_slow = p_slow
+        self.boundary_type = 'periodic'
+
+        # Initialize cars in ring order
+        self.positions = sample_positions(road_length, num_cars, self.rng)
+        self.car_ids = np.arange(1, num_cars + 1)
+        self.speeds = self.rng.integers(0, max_velocity + 1, size=num_cars)
+        self.gaps = self._gaps_from_positions(self.positions)
+        self._sorted = None  # Ascending positions and velocities, once per step
+
+        # Track statistics
+        self.flow_history = []
+        self.density_history = []
+
+    def _gaps_from_positions(self, positions):
+        """Empty cells between each car and its leader on the ring"""
+        return (np.roll(positions, -1) - positions - 1) % self.road_length
+
+    @property
+    def road(self):
+        """Car ID per cell, built on demand for visualization"""
+        road = np.zeros(self.road_length, dtype=np.int64)
+        road[self.positions] = self.car_ids
+        return road
+
+    @property
+    def velocities(self):
+        """Velocity per car ID, mirroring ``BaseTrafficSimulation.velocities``"""
+        return dict(zip(self.car_ids.tolist(), self.speeds.tolist()))
+
+    def vehicle_arrays(self):
+        """Return positions (ascending) and velocities of all cars"""
+        if self._sorted is None:
+            shift = -int(np.argmin(self.positions)) if len(self.positions) else 0
+            self._sorted = np.roll(self.positions, shift), np.roll(self.speeds, shift)
+        return self._sorted
+
+    def get_slowdown_probabilities(self, velocities):
+        """Slowdown probability per car (overridden in VDR model)"""
+        return self.p_slow
+
+    def get_window_density(self, start, end):
+        """Density over cells [start, end) by binary search in the sorted positions"""
+        positions, _ = self.vehicle_arrays()
+        counts = np.searchsorted(positions, end) - np.searchsorted(positions, start)
+        return counts / (np.asarray(end) - np.asarray(start))
+
+    def get_density_profile(self, window_size):
+        """Calculate density profile along the road"""
+        return self.get_window_density(*window_bounds(self.road_length, window_size))
+
+    def update(self):
+        """Update simulation state"""
+        v = self.speeds
+
+        # Step 1: Acceleration
+        v = np.minimum(v + 1, self.max_velocity)
+
+        # Step 2: Deceleration
+        v = np.minimum(v, self.gaps)
+
+        # Step 3: Randomization (uses the velocities of the previous step)
+        slow_down = self.rng.random(len(v)) < \
+            self.get_slowdown_probabilities(self.speeds)
+        v = np.maximum(0, v - slow_down)
+
+        # Step 4: Movement, the gap grows by what the leader drove
+        self.positions = (self.positions + v) % self.road_length
+        self.gaps = self.gaps - v + np.roll(v, -1)
+        self.speeds = v
+        self._sorted = None
+
+        # Update statistics
+        self.update_statistics()
+
+    def update_statistics(self):
+        """Update flow and density history"""
+        self.flow_history.append(self.get_current_flow())
+        self.density_history.append(self.get_current_density())
+
+    def get_current_density(self):
+        """Calculate current traffic density"""
+        return len(self.positions) / self.road_length
+
+    def get_current_flow(self):
+        """Calculate current traffic flow"""
+        return int(self.speeds.sum()) / self.road_length
+
+    def get_state(self):
+        """Return current state of the simulation"""
+        return self.road, self.velocities
+
+
+class GapVDRTrafficSimulation(GapTrafficSimulation):
+    """VDR extension of the gap-based traffic simulation"""
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow, p0_slow, seed=None):
+        super().__init__(road_length, num_cars, max_velocity, p_slow, seed)
+        self.p0_slow = p0_slow  # Additional slowdown probability for stopped cars
+
+    def get_slowdown_probabilities(self, velocities):
+        """Override to implement VDR behavior"""
+        return np.where(velocities == 0, self.p0_slow, self.p_slow)
+
+
+class GapMixedVDRTrafficSimulation(GapVDRTrafficSimulation):
+    """Mixed traffic VDR model with vehicles longer than one cell.
+
+    A vehicle's position is its front cell and it covers ``length`` cells
+    behind it (``VehicleProperties.length``, e.g. 2 cells for trucks). Gaps are
+    measured from the front of each vehicle to the tail of its leader, so
+    the update stays O(vehicles) whatever the share of trucks. Per-type
+    parameters are read from arrays indexed by the type codes of
+    ``VEHICLE_TYPE_CODES``.
+    """
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow, p0_slow,
+                 truck_ratio=0.15, seed=None, vehicle_mix=None):
+        self.rng = np.random.default_rng(seed)
+        self.road_length = road_length
+        self.max_velocity = max_velocity
+        self.p_slow = p_slow
+        self.p0_slow = p0_slow
+        self.boundary_type = 'periodic'
+        self.truck_ratio = truck_ratio
+        self.type_shares = vehicle_type_shares(truck_ratio, vehicle_mix)
+        self.vehicle_properties = build_vehicle_properties(max_velocity, p_slow, p0_slow)
+        self.type_tables = vehicle_parameter_tables(self.vehicle_properties)
+        self.num_vehicles = int(num_cars * 0.7)  # Same share as the other mixed engines
+        num_vehicles = self.num_vehicles
+
+        # Vehicle types in random ring order
+        self.types = self.rng.permutation(initial_vehicle_types(num_vehicles, self.type_shares))
+        self.lengths = self.type_tables['length'][self.types].astype(np.int64)
+        free_cells = road_length - int(self.lengths.sum())
+        if free_cells < 0:
+            raise ValueError("The vehicles do not fit on the road")
+
+        # Spread the free cells uniformly over the gaps, then stack the vehicles
+        slots = sample_positions(free_cells + num_vehicles, num_vehicles, self.rng)
+        tails = slots - np.arange(num_vehicles) + np.cumsum(self.lengths) - self.lengths
+        self.positions = tails + self.lengths - 1
+        self.car_ids = np.arange(1, num_vehicles + 1)
+        self.speeds = self.rng.integers(
+            0, self.type_tables['max_velocity'][self.types].astype(np.int64) + 1)
+        self.gaps = self._gaps_from_positions(self.positions)
+        self._sorted = None
+
+        # Track statistics
+        self.flow_history = []
+        self.density_history = []
+
+    def _gaps_from_positions(self, positions):
+        """Empty cells between each vehicle's front and its leader's tail"""
+        return (np.roll(positions - self.lengths, -1) - positions) % self.road_length
+
+    def _covered_cells(self):
+        """Ring-ordered vehicle index and cell of every covered cell"""
+        vehicles = np.repeat(np.arange(len(self.positions)), self.lengths)
+        offsets = np.arange(len(vehicles)) - np.repeat(np.cumsum(self.lengths) - self.lengths,
+                                                      self.lengths)
+        return vehicles, (self.positions[vehicles] - offsets) % self.road_length
+
+    @property
+    def road(self):
+        """Car ID per cell, every cell of a long vehicle included"""
+        road = np.zeros(self.road_length, dtype=np.int64)
+        vehicles, cells = self._covered_cells()
+        road[cells] = self.car_ids[vehicles]
+        return road
+
+    @property
+    def cell_types(self):
+        """Type code per cell, built on demand for visualization and logs"""
+        cell_types = np.zeros(self.road_length, dtype=np.int8)
+        cell_types[self.positions] = self.types
+        return cell_types
+
+    @property
+    def vehicle_types(self):
+        """Vehicle type per car ID, mirroring ``MixedVDRTrafficSimulation``"""
+        return {car_id: VEHICLE_TYPE_CODES[code]
+                for car_id, code in zip(self.car_ids.tolist(), self.types.tolist())}
+
+    def _covered_segments(self):
+        """Start cells (ascending) and lengths of the covered stretches of road"""
+        order = np.argsort(self.positions, kind='stable')
+        lengths = self.lengths[order]
+        starts = self.positions[order] - lengths + 1
+        if len(starts) and starts[0] < 0:
+            # The first vehicle wraps around: split it at the end of the road
+            starts = np.append(starts, self.road_length + starts[0])
+            lengths = np.append(lengths, -starts[0])
+            lengths[0] += starts[0]
+            starts[0] = 0
+            order = np.argsort(starts, kind='stable')
+            starts, lengths = starts[order], lengths[order]
+        return starts, lengths
+
+    def get_window_density(self, start, end):
+        """Fraction of cells in [start, end) covered by a vehicle"""
+        starts, lengths = self._covered_segments()
+        covered = np.concatenate([[0], np.cumsum(lengths)])
+
+        def covered_before(x):
+            # All stretches starting before x, minus the part of the last one past x
+            k = np.searchsorted(starts, x)
+            last = np.maximum(k - 1, 0)
+            overhang = np.where(k > 0, np.maximum(0, starts[last] + lengths[last] - x), 0) \
+                if len(starts) else 0
+            return covered[k] - overhang
+
+        start, end = np.asarray(start), np.asarray(end)
+        return (covered_before(end) - covered_before(start)) / (end - start)
+
+    def update(self):
+        """Update simulation state"""
+        velocities = self.speeds
+        types = self.types
+        draws = self.rng.random((2, len(velocities)))  # Slowdown, recovery from a stop
+
+        # Step 1: Acceleration with recovery for stopped vehicles
+        recovered = draws[1] < self.type_tables['recovery_rate'][types]
+        moving = np.minimum(velocities + self.type_tables['acceleration'][types],
+                            self.type_tables['max_velocity'][types])
+        v = np.where(velocities == 0, recovered, moving).astype(np.int64)
+
+        # Step 2: Deceleration, up to the leader's tail
+        v = np.minimum(v, self.gaps)
+
+        # Step 3: Randomization, only moving vehicles slow down
+        v = v - ((v > 0) & (draws[0] < self.type_tables['p_slow'][types]))
+
+        # Step 4: Movement, the gap grows by what the leader drove
+        self.positions = (self.positions + v) % self.road_length
+        self.gaps = self.gaps - v + np.roll(v, -1)
+        self.speeds = v
+        self._sorted = None
+
+        # Update statistics
+        self.update_statistics()
+
+    def get_occupancy(self):
+        """Fraction of cells covered by a vehicle"""
+        return int(self.lengths.sum()) / self.road_length
+
+    def get_current_density(self):
+        """Traffic density as covered cells, like the density profile"""
+        return self.get_occupancy()
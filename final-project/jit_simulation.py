@@ -0,0 +1,159 @@
+import numpy as np
+from traffic_simulation import MixedVDRTrafficSimulation, draw_vehicle_types
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # Fall back to the pure-Python update
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in so the kernel below still defines cleanly"""
+        return lambda func: func
+
+
+@njit(cache=True)
+def mixed_vdr_kernel(road, cell_velocities, cell_types,
+                     max_velocity, acceleration, p_slow, p0_slow, recovery_rate,
+                     uniforms, closed, open_boundary, beta):
+    """Apply one step of the mixed VDR rules to every vehicle on the road.
+
+    Mirrors ``MixedVDRTrafficSimulation.update`` cell by cell, including the
+    gap rules of ``get_distance_to_next_car``. ``uniforms`` is the parent's
+    block of draws: three per vehicle in road order (acceleration,
+    randomization, exit). Returns the road value (the vehicle's key), new
+    position, velocity and type code of the remaining vehicles in road order.
+    """
+    road_length = road.shape[0]
+
+    # Next occupied cell ahead of every cell, scanning from the end
+    next_car = np.full(road_length, -1, dtype=np.int64)
+    ahead = -1
+    for pos in range(road_length - 1, -1, -1):
+        next_car[pos] = ahead
+        if road[pos] != 0:
+            ahead = pos
+    first_car = ahead
+
+    num_cars = 0
+    for pos in range(road_length):
+        if road[pos] != 0:
+            num_cars += 1
+    out_ids = np.empty(num_cars, dtype=np.int64)
+    out_positions = np.empty(num_cars, dtype=np.int64)
+    out_velocities = np.empty(num_cars, dtype=np.int64)
+    out_types = np.empty(num_cars, dtype=np.int8)
+
+    index = 0
+    count = 0
+    for pos in range(road_length):
+        car_id = road[pos]
+        if car_id == 0:
+            continue
+        draws = uniforms[3 * index:3 * index + 3]
+        index += 1
+        vehicle_type = cell_types[pos]
+        v = cell_velocities[pos]
+
+        # Distance to the next car, as in get_distance_to_next_car
+        if pos >= road_length - 1:
+            d = 1 if closed else road_length
+        elif next_car[pos] >= 0:
+            d = next_car[pos] - pos
+        elif closed and first_car < pos:
+            d = road_length - pos + first_car
+        elif closed:
+            d = road_length
+        else:
+            d = road_length - pos
+
+        # Step 1: Acceleration (VDR)
+        if v == 0:
+            if draws[0] < recovery_rate[vehicle_type]:
+                v = 1
+        else:
+            v = int(min(v + acceleration[vehicle_type], max_velocity[vehicle_type]))
+
+        # Step 2: Distance consideration (VDR)
+        v = min(v, d - 1)
+
+        # Step 3: Randomization (VDR with vehicle specifics)
+        if v > 0 and draws[1] < p_slow[vehicle_type]:
+            v -= 1  # Stopped vehicles stay stopped either way
+
+        # Step 4: Movement
+        new_pos = pos + v
+        if open_boundary:
+            if new_pos >= road_length - 1:
+                if draws[2] < beta:
+                    continue
+                new_pos = pos
+        else:
+            new_pos = new_pos % road_length
+
+        out_ids[count] = car_id
+        out_positions[count] = new_pos
+        out_velocities[count] = v
+        out_types[count] = vehicle_type
+        count += 1
+
+    return out_ids[:count], out_positions[:count], out_velocities[:count], out_types[:count]
+
+
+class JITMixedVDRTrafficSimulation(MixedVDRTrafficSimulation):
+    """Mixed VDR model whose update runs in a compiled Numba kernel.
+
+    The kernel reads the slots scattered onto per-cell arrays and returns
+    the slots of the moved vehicles with their new state, so the analyzer and
+    visualization see the usual surface. Without Numba installed the class
+    behaves exactly like the parent.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_jit = NUMBA_AVAILABLE
+
+    def update(self):
+        """Update simulation state through the compiled kernel"""
+        if not self.use_jit:
+            super().update()
+            return
+
+        # The kernel sees every vehicle as its slot + 1 on the road
+        slots = self.slots
+        positions = slots.positions[slots.order]
+        road = np.zeros(self.road_length, dtype=np.int64)
+        cell_velocities = np.zeros(self.road_length, dtype=np.int64)
+        cell_types = np.zeros(self.road_length, dtype=np.int8)
+        road[positions] = slots.order + 1
+        cell_velocities[positions] = slots.velocities[slots.order]
+        cell_types[positions] = slots.types[slots.order]
+
+        # Same block of draws as the parent: three per vehicle, then
+        # entrance and vehicle type
+        uniforms = self.rng.random(3 * np.count_nonzero(road) + 2)
+        entering = self.boundary_type == 'open' and road[0] == 0 \
+            and uniforms[-2] < self.alpha
+
+        tables = self.type_tables
+        moved, positions, velocities, _ = mixed_vdr_kernel(
+            road, cell_velocities, cell_types,
+            tables['max_velocity'], tables['acceleration'], tables['p_slow'],
+            tables['p0_slow'], tables['recovery_rate'], uniforms,
+            self.boundary_type == 'closed', self.boundary_type == 'open', self.beta)
+
+        # Free the slots of vehicles that left or were hidden by another one
+        moved -= 1
+        remaining = np.zeros(len(slots.ids), dtype=bool)
+        remaining[moved] = True
+        slots.release(slots.order[~remaining[slots.order]])
+        slots.positions[moved] = positions
+        slots.velocities[moved] = velocities
+        order = moved[np.argsort(positions, kind='stable')]
+
+        # Handle entrance
+        if entering:
+            type_code = draw_vehicle_types(uniforms[-1], self.type_shares)
+            order = np.concatenate([slots.allocate(0, 0, type_code), order])
+        slots.order = order
+        self._occupancy_prefix = None
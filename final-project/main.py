@@ -1,11 +1,37 @@
 from traffic_simulation import BaseTrafficSimulation, VDRTrafficSimulation, MixedVDRTrafficSimulation
+from vectorized_simulation import VectorizedTrafficSimulation, VectorizedVDRTrafficSimulation
+from gap_simulation import GapTrafficSimulation, GapVDRTrafficSimulation, GapMixedVDRTrafficSimulation
+from jit_simulation import JITMixedVDRTrafficSimulation
+from compact_simulation import (CompactTrafficSimulation, CompactVDRTrafficSimulation,
+                                CompactMixedVDRTrafficSimulation)
+from decomposed_simulation import DecomposedTrafficSimulation, DecomposedVDRTrafficSimulation
+from multilane_simulation import MultiLaneVDRTrafficSimulation, MultiLaneMixedVDRTrafficSimulation
 from traffic_visualization import TrafficVisualization
+from vehicle_types import VehicleType
 from traffic_analysis import TrafficAnalyzer
+from streaming_statistics import enable_streaming
+from space_time import SpaceTimeRecorder
+from trajectory_log import TrajectoryLogger
+from checkpoint import Checkpointer, load_checkpoint, restore_simulation, simulation_state
 import matplotlib.pyplot as plt
+import argparse
+import functools
 import signal
 import sys
-from dataclasses import dataclass
-from typing import Dict, Any
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace
+from typing import Dict, Any, Optional
+
+# Models each engine implements; the reference engine implements all of them
+ENGINE_MODELS = {
+    'reference': ('basic', 'vdr', 'mvdr'),
+    'vectorized': ('basic', 'vdr'),
+    'gap': ('basic', 'vdr', 'mvdr'),
+    'jit': ('mvdr',),
+    'compact': ('basic', 'vdr', 'mvdr'),
+    'decomposed': ('basic', 'vdr'),
+}
 
 @dataclass
 class SimulationConfig:
@@ -20,11 +46,32 @@ class SimulationConfig:
     p0_slow: float
     steps: int
     truck_ratio: float = 0.2  # Default truck ratio for mixed traffic
+    engine: str = 'reference'  # 'reference', 'vectorized', 'gap', 'jit', 'compact' or 'decomposed'
+    history_size: Optional[int] = None  # Keep only this many recent values per series
+    space_time_file: Optional[str] = None  # Record a space-time diagram into this file
+    trajectory_file: Optional[str] = None  # Log every vehicle of every step into this file
+    checkpoint_file: Optional[str] = None  # Save comparison progress into this file
+    checkpoint_interval: int = 500  # Steps between checkpoints
+    seed: Optional[int] = None  # Seed of each simulation's random number generator
+    lanes: int = 1  # Parallel lanes; more than one selects the multi-lane engine
+    lane_change: str = 'symmetric'  # 'symmetric' or 'asymmetric' (keep right) lane changes
+    truck_lanes: Optional[int] = None  # Trucks keep to this many rightmost lanes
+    workers: Optional[int] = None  # Processes of the decomposed engine or replica pool (default: all cores)
+    vehicle_mix: Optional[str] = None  # Shares of other vehicle types, e.g. 'truck=0.1,bus=0.05'
+    tolerance: Optional[float] = None  # Stop once the flow CI half-width is below this
+    check_interval: int = 500  # Steps between convergence checks; steps is then the maximum
+    replicas: int = 1  # Independently seeded runs per model in comparison mode
 
 class SimulationManager:
     """Manager class to handle simulation creation and execution"""
     
-    def __init__(self):
+    def __init__(self, headless: bool = False):
+        # Headless runs keep plotting out of the step loop and only save figures
+        self.headless = headless
+        self.recorders = {}  # Space-time recorders by model type
+        self.loggers = {}  # Trajectory loggers by model type
+        self.checkpointer = None  # Active while a checkpointed comparison runs
+        self.stop_requested = False  # Set by CTRL+C, handled after the current step
         self.configs = {
             'single': SimulationConfig(
                 road_length=50,    # Shorter road for visualization
@@ -52,12 +99,60 @@ class SimulationManager:
             )
         }
     
-    def create_simulation(self, model_type: str, mode: str) -> BaseTrafficSimulation:
-        """Create simulation based on model type and mode"""
+    def create_simulation(self, model_type: str, mode: str,
+                          recordings: Optional[Dict[str, Any]] = None) -> BaseTrafficSimulation:
+        """Create simulation based on model type and mode
+        
+        ``recordings`` holds the recording positions of a checkpoint; the
+        recordings then continue instead of starting over.
+        """
         config = self.configs[mode]
+        recordings = recordings or {}
+        sim = self._create_engine(model_type, config)
+        if config.history_size is not None:
+            enable_streaming(sim, config.history_size)
+        if config.space_time_file is not None:
+            self.recorders[model_type] = SpaceTimeRecorder(
+                sim, config.steps, f'{model_type}_{config.space_time_file}',
+                start=recordings.get('space_time', 0)).attach()
+        if config.trajectory_file is not None:
+            self.loggers[model_type] = TrajectoryLogger(
+                sim, f'{model_type}_{config.trajectory_file}',
+                resume=recordings.get('trajectory')).attach()
+        return sim
+    
+    def _recording_state(self, model_type: str) -> Dict[str, Any]:
+        """Positions of the model's recordings, stored with a checkpoint"""
+        recordings = {}
+        if model_type in self.recorders:
+            recordings['space_time'] = self.recorders[model_type].resume_state()
+        if model_type in self.loggers:
+            recordings['trajectory'] = self.loggers[model_type].resume_state()
+        return recordings
+    
+    def _create_engine(self, model_type: str, config: SimulationConfig) -> BaseTrafficSimulation:
+        """Instantiate the simulation class selected by the model type and engine"""
+        if config.engine not in ENGINE_MODELS:
+            raise ValueError(f"Unknown engine {config.engine!r}")
+        if config.lanes > 1:
+            if config.engine != 'reference':
+                raise ValueError("Multi-lane roads only run on the reference engine")
+            return self._create_multilane_simulation(model_type, config)
+        if model_type not in ENGINE_MODELS[config.engine]:
+            raise ValueError(f"The {config.engine} engine does not support the {model_type} model")
+        if config.engine == 'vectorized':
+            return self._create_vectorized_simulation(model_type, config)
+        if config.engine == 'gap':
+            return self._create_gap_simulation(model_type, config)
+        if config.engine == 'compact':
+            return self._create_compact_simulation(model_type, config)
+        if config.engine == 'decomposed':
+            return self._create_decomposed_simulation(model_type, config)
         
         if model_type == 'mvdr':
-            return MixedVDRTrafficSimulation(
+            mixed_class = (JITMixedVDRTrafficSimulation if config.engine == 'jit'
+                           else MixedVDRTrafficSimulation)
+            return mixed_class(
                 road_length=config.road_length,
                 num_cars=config.num_cars,
                 max_velocity=config.v_max,
@@ -66,7 +161,9 @@ class SimulationManager:
                 boundary_type=config.boundary_type,
                 alpha=config.alpha,
                 beta=config.beta,
-                truck_ratio=config.truck_ratio
+                truck_ratio=config.truck_ratio,
+                vehicle_mix=parse_vehicle_mix(config.vehicle_mix),
+                seed=config.seed
             )
         elif model_type == 'vdr':
             return VDRTrafficSimulation(
@@ -77,7 +174,8 @@ class SimulationManager:
                 p0_slow=config.p0_slow,
                 boundary_type=config.boundary_type,
                 alpha=config.alpha,
-                beta=config.beta
+                beta=config.beta,
+                seed=config.seed
             )
         else:  # basic
             return BaseTrafficSimulation(
@@ -87,30 +185,253 @@ class SimulationManager:
                 p_slow=config.p_slow,
                 boundary_type=config.boundary_type,
                 alpha=config.alpha,
-                beta=config.beta
+                beta=config.beta,
+                seed=config.seed
+            )
+    
+    def _create_vectorized_simulation(self, model_type: str,
+                                      config: SimulationConfig):
+        """Create a simulation backed by the whole-array update engine"""
+        if model_type == 'vdr':
+            return VectorizedVDRTrafficSimulation(
+                road_length=config.road_length,
+                num_cars=config.num_cars,
+                max_velocity=config.v_max,
+                p_slow=config.p_slow,
+                p0_slow=config.p0_slow,
+                boundary_type=config.boundary_type,
+                alpha=config.alpha,
+                beta=config.beta,
+                seed=config.seed
+            )
+        return VectorizedTrafficSimulation(
+            road_length=config.road_length,
+            num_cars=config.num_cars,
+            max_velocity=config.v_max,
+            p_slow=config.p_slow,
+            boundary_type=config.boundary_type,
+            alpha=config.alpha,
+            beta=config.beta,
+            seed=config.seed
+        )
+    
+    def _create_gap_simulation(self, model_type: str, config: SimulationConfig):
+        """Create a vehicle-centric simulation for a periodic road"""
+        if config.boundary_type == 'open':
+            raise ValueError("The gap engine only supports periodic boundaries")
+        
+        if model_type == 'mvdr':
+            return GapMixedVDRTrafficSimulation(
+                road_length=config.road_length,
+                num_cars=config.num_cars,
+                max_velocity=config.v_max,
+                p_slow=config.p_slow,
+                p0_slow=config.p0_slow,
+                truck_ratio=config.truck_ratio,
+                vehicle_mix=parse_vehicle_mix(config.vehicle_mix),
+                seed=config.seed
+            )
+        elif model_type == 'vdr':
+            return GapVDRTrafficSimulation(
+                road_length=config.road_length,
+                num_cars=config.num_cars,
+                max_velocity=config.v_max,
+                p_slow=config.p_slow,
+                p0_slow=config.p0_slow,
+                seed=config.seed
+            )
+        return GapTrafficSimulation(
+            road_length=config.road_length,
+            num_cars=config.num_cars,
+            max_velocity=config.v_max,
+            p_slow=config.p_slow,
+            seed=config.seed
+        )
+    
+    def _create_decomposed_simulation(self, model_type: str, config: SimulationConfig):
+        """Create a periodic road split into chunks updated by worker processes"""
+        if config.boundary_type == 'open':
+            raise ValueError("The decomposed engine only supports periodic boundaries")
+        
+        if model_type == 'vdr':
+            return DecomposedVDRTrafficSimulation(
+                road_length=config.road_length,
+                num_cars=config.num_cars,
+                max_velocity=config.v_max,
+                p_slow=config.p_slow,
+                p0_slow=config.p0_slow,
+                workers=config.workers,
+                seed=config.seed
+            )
+        return DecomposedTrafficSimulation(
+            road_length=config.road_length,
+            num_cars=config.num_cars,
+            max_velocity=config.v_max,
+            p_slow=config.p_slow,
+            workers=config.workers,
+            seed=config.seed
+        )
+    
+    def _create_compact_simulation(self, model_type: str, config: SimulationConfig):
+        """Create a simulation with one byte of state per road cell"""
+        if model_type == 'mvdr':
+            return CompactMixedVDRTrafficSimulation(
+                road_length=config.road_length,
+                num_cars=config.num_cars,
+                max_velocity=config.v_max,
+                p_slow=config.p_slow,
+                p0_slow=config.p0_slow,
+                boundary_type=config.boundary_type,
+                alpha=config.alpha,
+                beta=config.beta,
+                truck_ratio=config.truck_ratio,
+                vehicle_mix=parse_vehicle_mix(config.vehicle_mix),
+                seed=config.seed
+            )
+        elif model_type == 'vdr':
+            return CompactVDRTrafficSimulation(
+                road_length=config.road_length,
+                num_cars=config.num_cars,
+                max_velocity=config.v_max,
+                p_slow=config.p_slow,
+                p0_slow=config.p0_slow,
+                boundary_type=config.boundary_type,
+                alpha=config.alpha,
+                beta=config.beta,
+                seed=config.seed
+            )
+        return CompactTrafficSimulation(
+            road_length=config.road_length,
+            num_cars=config.num_cars,
+            max_velocity=config.v_max,
+            p_slow=config.p_slow,
+            boundary_type=config.boundary_type,
+            alpha=config.alpha,
+            beta=config.beta,
+            seed=config.seed
+        )
+    
+    def _create_multilane_simulation(self, model_type: str, config: SimulationConfig):
+        """Create a simulation of a road with several lanes"""
+        if model_type == 'mvdr':
+            truck_lanes = (None if config.truck_lanes is None
+                           else range(min(config.truck_lanes, config.lanes)))
+            return MultiLaneMixedVDRTrafficSimulation(
+                num_lanes=config.lanes,
+                road_length=config.road_length,
+                num_cars=config.num_cars,
+                max_velocity=config.v_max,
+                p_slow=config.p_slow,
+                p0_slow=config.p0_slow,
+                boundary_type=config.boundary_type,
+                alpha=config.alpha,
+                beta=config.beta,
+                truck_ratio=config.truck_ratio,
+                vehicle_mix=parse_vehicle_mix(config.vehicle_mix),
+                truck_lanes=truck_lanes,
+                lane_change=config.lane_change,
+                seed=config.seed
             )
+        # Basic NaSch is the VDR model with the same slowdown for stopped cars
+        return MultiLaneVDRTrafficSimulation(
+            num_lanes=config.lanes,
+            road_length=config.road_length,
+            num_cars=config.num_cars,
+            max_velocity=config.v_max,
+            p_slow=config.p_slow,
+            p0_slow=config.p0_slow if model_type == 'vdr' else config.p_slow,
+            boundary_type=config.boundary_type,
+            alpha=config.alpha,
+            beta=config.beta,
+            lane_change=config.lane_change,
+            seed=config.seed
+        )
     
     def run_single_simulation(self, model_type: str):
         """Run a single model simulation"""
         sim = self.create_simulation(model_type, 'single')
-        self._run_simulation(sim, self.configs['single'].steps)
+        if self.headless:
+            self._run_headless_simulation(sim, model_type, self.configs['single'].steps)
+        else:
+            self._run_simulation(sim, self.configs['single'].steps)
+        self._finish_recordings(model_type)
     
-    def run_comparison(self):
-        """Run comparison between all models"""
-        analyzer = TrafficAnalyzer()
+    def run_comparison(self, checkpoint: Optional[Dict[str, Any]] = None):
+        """Run comparison between all models, optionally resuming from a checkpoint"""
+        config = self.configs['comparison']
+        unsupported = [m for m in ('basic', 'vdr', 'mvdr') if m not in ENGINE_MODELS.get(config.engine, ())]
+        if unsupported:
+            raise ValueError(f"The comparison needs an engine for every model; the {config.engine} "
+                             f"engine does not support {', '.join(unsupported)}")
+        if config.replicas > 1 and checkpoint is None:
+            self._run_replicated_comparison()
+            return
+        analyzer = TrafficAnalyzer(retention=config.history_size, steps=config.steps)
+        completed = []
+        if checkpoint is not None:
+            analyzer.metrics = checkpoint['metrics']
+            completed = list(checkpoint['completed'])
+        if config.checkpoint_file is not None:
+            if config.engine == 'decomposed':
+                raise ValueError("Decomposed runs cannot be checkpointed")
+            self.checkpointer = Checkpointer(config.checkpoint_file, config.checkpoint_interval)
         
         for model_type in ['basic', 'vdr', 'mvdr']:
+            if model_type in completed:
+                continue
             print(f"\nRunning {model_type.upper()} model simulation...")
-            sim = self.create_simulation(model_type, 'comparison')
-            vis = TrafficVisualization(sim)
+            resuming = checkpoint is not None and checkpoint['model_type'] == model_type
+            sim = self.create_simulation(
+                model_type, 'comparison',
+                checkpoint.get('recordings') if resuming else None)
+            start = 0
+            if resuming:
+                # Continue exactly where the checkpointed run left off
+                restore_simulation(sim, checkpoint['simulation'])
+                start = checkpoint['step'] + 1
+                print(f"Resuming at step {start}")
+            vis = None if self.headless else TrafficVisualization(sim)
             
             try:
-                self._run_comparison_simulation(sim, vis, analyzer, model_type)
+                self._run_comparison_simulation(sim, vis, analyzer, model_type,
+                                                start, completed)
             except KeyboardInterrupt:
                 print(f'\n{model_type} simulation stopped by user')
                 plt.close('all')
                 continue
+            finally:
+                self._finish_recordings(model_type)
+            completed.append(model_type)
         
+        if self.checkpointer is not None:
+            self.checkpointer.close()
+            self.checkpointer = None
+        self._generate_analysis(analyzer)
+    
+    def _run_replicated_comparison(self):
+        """Run seeded replicas of every model in a process pool and compare them"""
+        config = self.configs['comparison']
+        if config.engine == 'decomposed':
+            raise ValueError("Replicas cannot use the decomposed engine")
+        if config.checkpoint_file or config.space_time_file or config.trajectory_file:
+            raise ValueError("Checkpoints and recordings need a single replica")
+        
+        # One seed stream per model, split into one per replica
+        model_types = ['basic', 'vdr', 'mvdr']
+        seeds = np.random.SeedSequence(config.seed).spawn(len(model_types))
+        jobs = [(model_type, replica_seed) for model_type, seed in zip(model_types, seeds)
+                for replica_seed in seed.spawn(config.replicas)]
+        
+        print(f"\nRunning {config.replicas} replicas of each model...")
+        with ProcessPoolExecutor(max_workers=config.workers) as pool:
+            futures = [pool.submit(run_replica, model_type, replace(config, seed=seed))
+                       for model_type, seed in jobs]
+            results = [future.result() for future in futures]
+        
+        analyzer = TrafficAnalyzer(retention=config.history_size, steps=config.steps)
+        for model_type in model_types:
+            analyzer.add_replicas(model_type, [metrics for (m, _), metrics in zip(jobs, results)
+                                               if m == model_type])
         self._generate_analysis(analyzer)
     
     def _run_simulation(self, sim: BaseTrafficSimulation, steps: int):
@@ -130,25 +451,106 @@ class SimulationManager:
             print('\nSimulation stopped by user')
             plt.close('all')
     
+    def _run_headless_simulation(self, sim: BaseTrafficSimulation, model_type: str,
+                                 steps: int):
+        """Run a simulation without plotting and save the final state"""
+        for step in range(steps):
+            sim.update()
+        
+        if len(sim.flow_history):
+            print(f"\nAverage Flow Rate: {np.mean(sim.flow_history):.3f}")
+            print(f"Average Density: {np.mean(sim.density_history):.3f}")
+        vis = TrafficVisualization(sim)
+        vis.save_plot(steps - 1, f'{model_type}_final_state.png')
+        plt.close(vis.fig)
+    
     def _run_comparison_simulation(self, sim: BaseTrafficSimulation, 
-                                 vis: TrafficVisualization,
+                                 vis: Optional[TrafficVisualization],
                                  analyzer: TrafficAnalyzer,
-                                 model_type: str):
+                                 model_type: str, start: int = 0,
+                                 completed: Optional[list] = None):
         """Run a single comparison simulation"""
-        for step in range(self.configs['comparison'].steps):
+        config = self.configs['comparison']
+        metrics = analyzer.metrics[model_type]
+        if config.tolerance is not None and metrics.retention is not None:
+            raise ValueError("Convergence stopping needs the full history (no history_size)")
+        for step in range(start, config.steps):
             sim.update()
-            vis.update_plot(step)
+            if vis is not None:
+                vis.update_plot(step)
             analyzer.collect_metrics(sim, model_type, step)
+            
+            # Stop once the steady-state flow is known precisely enough
+            if config.tolerance is not None and (step + 1) % config.check_interval == 0:
+                metrics.detect_warmup()
+                _, half_width = metrics.flow_interval()
+                if half_width < config.tolerance:
+                    if config.replicas == 1:
+                        print(f"Flow converged after {step + 1} steps (+/-{half_width:.4f})")
+                    break
+            
+            if self.checkpointer is None:
+                continue
+            if self.stop_requested or self.checkpointer.due(step):
+                state = {
+                    'config': self.configs['comparison'],
+                    'completed': completed or [],
+                    'model_type': model_type,
+                    'step': step,
+                    'simulation': simulation_state(sim),
+                    'metrics': analyzer.metrics,
+                    'recordings': self._recording_state(model_type)
+                }
+                self.checkpointer.save(state, wait=self.stop_requested)
+            if self.stop_requested:
+                self.checkpointer.close()
+                print(f"\nCheckpoint saved as {self.checkpointer.filename} "
+                      f"(resume with --resume {self.checkpointer.filename})")
+                plt.close('all')
+                sys.exit(0)
+        
+        # Averages only cover the steady state; replicas report theirs in the summary
+        metrics.detect_warmup()
+        if config.replicas == 1:
+            print(f"Warm-up: {metrics.warmup} of {metrics.count} steps discarded")
+    
+    def _finish_recordings(self, model_type: str):
+        """Render the space-time diagram and close the trajectory log of the model"""
+        recorder = self.recorders.pop(model_type, None)
+        if recorder is not None:
+            recorder.render(model_type.upper(), f'{model_type}_space_time.png')
+        logger = self.loggers.pop(model_type, None)
+        if logger is not None:
+            logger.close()
+            print(f"\nTrajectory log saved as {logger.filename}")
     
     def _generate_analysis(self, analyzer: TrafficAnalyzer):
         """Generate all analysis visualizations"""
         analyzer.save_statistics_comparison()
         analyzer.print_summary_statistics()
+        analyzer.print_model_comparison()
         analyzer.analyze_spatial_patterns()
         analyzer.analyze_traffic_efficiency()
 
-def signal_handler(sig, frame):
-    """Handle graceful exit on CTRL+C"""
+def run_replica(model_type: str, config: SimulationConfig):
+    """Run one comparison replica of a model (in a worker process) and return its metrics"""
+    manager = SimulationManager(headless=True)
+    manager.configs['comparison'] = config
+    analyzer = TrafficAnalyzer(retention=config.history_size, steps=config.steps)
+    sim = manager.create_simulation(model_type, 'comparison')
+    manager._run_comparison_simulation(sim, None, analyzer, model_type)
+    return analyzer.metrics[model_type]
+
+def signal_handler(manager, sig, frame):
+    """Handle graceful exit on CTRL+C
+    
+    While a checkpointed run is active, the first CTRL+C only asks the step
+    loop to save a final checkpoint after the current step and exit.
+    """
+    if manager.checkpointer is not None and not manager.stop_requested:
+        print('\nStopping after the current step...')
+        manager.stop_requested = True
+        return
     print('\nSimulation stopped gracefully')
     plt.close('all')
     sys.exit(0)
@@ -161,10 +563,70 @@ def get_user_input(prompt: str, valid_options: list) -> str:
             return choice
         print(f"Invalid input. Please enter one of: {', '.join(valid_options)}")
 
-def main():
+def parse_vehicle_mix(text: Optional[str]):
+    """Parse 'type=share,...' into shares per vehicle type (None: use truck_ratio)"""
+    if not text:
+        return None
+    mix = {}
+    for item in text.split(','):
+        name, _, share = item.partition('=')
+        mix[VehicleType(name.strip().lower())] = float(share)
+    return mix
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line options for non-interactive runs"""
+    parser = argparse.ArgumentParser(description="Traffic flow simulation")
+    parser.add_argument('--mode', choices=['single', 'comparison'],
+                        help="Run without prompts in this mode")
+    parser.add_argument('--model', choices=['basic', 'vdr', 'mvdr'], default='basic',
+                        help="Model for single mode")
+    parser.add_argument('--headless', action='store_true',
+                        help="No GUI; only save figures at the end (Agg backend)")
+    parser.add_argument('--resume', metavar='CHECKPOINT',
+                        help="Continue a comparison run from a checkpoint file")
+    
+    # Overrides for the SimulationConfig of the selected mode
+    overrides = parser.add_argument_group('config overrides')
+    option_types = {int: int, float: float, Optional[int]: int, Optional[float]: float}
+    option_choices = {'engine': list(ENGINE_MODELS), 'lane_change': ['symmetric', 'asymmetric'],
+                      'boundary_type': ['open', 'closed', 'periodic']}
+    for field in fields(SimulationConfig):
+        overrides.add_argument('--' + field.name.replace('_', '-'),
+                               type=option_types.get(field.type, str),
+                               choices=option_choices.get(field.name))
+    return parser.parse_args(argv)
+
+def apply_overrides(config: SimulationConfig, args: argparse.Namespace):
+    """Copy every command-line override that was given onto the config"""
+    for field in fields(SimulationConfig):
+        value = getattr(args, field.name)
+        if value is not None:
+            setattr(config, field.name, value)
+
+def main(argv=None):
     """Main entry point"""
-    signal.signal(signal.SIGINT, signal_handler)
-    manager = SimulationManager()
+    args = parse_args(argv)
+    if args.headless:
+        plt.switch_backend('Agg')
+    manager = SimulationManager(headless=args.headless)
+    signal.signal(signal.SIGINT, functools.partial(signal_handler, manager))
+    
+    if args.resume is not None:
+        # The checkpoint carries the config of the interrupted run
+        checkpoint = load_checkpoint(args.resume)
+        manager.configs['comparison'] = checkpoint['config']
+        apply_overrides(manager.configs['comparison'], args)
+        manager.run_comparison(checkpoint)
+        return
+    
+    if args.mode is not None:
+        # Non-interactive run, e.g. from cron or a compute node
+        apply_overrides(manager.configs[args.mode], args)
+        if args.mode == 'single':
+            manager.run_single_simulation(args.model)
+        else:
+            manager.run_comparison()
+        return
     
     mode = get_user_input(
         "\nChoose simulation mode:\n1. Single simulation\n2. Model comparison\nEnter 1 or 2: ",
@@ -0,0 +1,310 @@
+import numpy as np
+from ensemble_simulation import gaps_ahead, gaps_behind
+from traffic_simulation import (build_vehicle_properties, draw_vehicle_types,
+                                vehicle_parameter_tables, vehicle_type_shares,
+                                occupancy_prefix, window_densities, window_bounds)
+from vehicle_types import VehicleType, VEHICLE_TYPE_CODES
+
+EMPTY = -1  # Cell value of an empty cell
+
+class MultiLaneVDRTrafficSimulation:
+    """VDR model on a road with several parallel lanes.
+
+    ``road`` is a (lanes x cells) int8 array holding the velocity of the
+    vehicle in each cell, or ``EMPTY``; lane 0 is the rightmost lane. A step
+    first lets vehicles change lanes and then applies the single-lane VDR
+    rules to every lane. Both stages act on all vehicles of all lanes with
+    the same few array operations, so a step costs O(lanes x cells) without
+    a Python loop per lane or vehicle.
+
+    Lane changes follow Rickert et al. (1996): a vehicle blocked in its own
+    lane (gap < v + 1) moves sideways with probability ``p_change`` when the
+    neighbouring lane has a longer gap ahead, the cell beside it is free and
+    at least ``max_velocity`` cells behind it are empty. With
+    ``lane_change='symmetric'`` both directions use that rule (left first);
+    with ``'asymmetric'`` vehicles overtake on the left only and return to
+    the right as soon as the gap ahead there is at least v + 1.
+    """
+
+    draws_per_vehicle = 3  # Uniforms per vehicle and step: lane change, slowdown, exit
+
+    def __init__(self, num_lanes, road_length, num_cars, max_velocity, p_slow, p0_slow,
+                 boundary_type='periodic', alpha=0.3, beta=0.3,
+                 lane_change='symmetric', p_change=1.0, seed=None):
+        if lane_change not in ('symmetric', 'asymmetric'):
+            raise ValueError(f"Unknown lane change rule: {lane_change}")
+        if max_velocity > np.iinfo(np.int8).max:
+            raise ValueError("max_velocity must fit in a signed byte")
+        self.rng = np.random.default_rng(seed)
+        self.num_lanes = num_lanes
+        self.road_length = road_length
+        self.road = np.full((num_lanes, road_length), EMPTY, dtype=np.int8)
+        self.max_velocity = max_velocity
+        self.p_slow = p_slow
+        self.p0_slow = p0_slow  # Slowdown probability for stopped vehicles
+        self.boundary_type = boundary_type
+        self.alpha = alpha
+        self.beta = beta
+        self.lane_change = lane_change
+        self.p_change = p_change
+
+        # Initialize cars on distinct cells of all lanes
+        if boundary_type != 'open':
+            cells = self.rng.choice(self.road.size, min(num_cars, self.road.size),
+                                    replace=False)
+            self.road.flat[cells] = self.rng.integers(0, max_velocity + 1, size=len(cells))
+
+        # Track statistics
+        self.flow_history = []
+        self.density_history = []
+        self.lane_change_history = []  # Number of lane changes per step
+
+    def _payload_arrays(self):
+        """Per-cell arrays that travel with the vehicles, besides ``road``"""
+        return []
+
+    def lane_allowed(self, lanes, flat):
+        """Whether the vehicles at flat indices ``flat`` may use ``lanes``"""
+        return np.ones(len(flat), dtype=bool)
+
+    def accelerate(self, velocities, flat, draws):
+        """Step 1: Acceleration"""
+        return np.minimum(velocities + 1, self.max_velocity)
+
+    def randomize(self, v, velocities, flat, draws):
+        """Step 3: Randomization with the VDR slowdown probability"""
+        p = np.where(velocities == 0, self.p0_slow, self.p_slow)
+        return np.maximum(v - (draws[1] < p), 0)
+
+    def enter_vehicles(self, lanes, draws):
+        """Hook for vehicles placed on the first cell of ``lanes``"""
+
+    def change_lanes(self, draws):
+        """Move every vehicle that wants to and safely can to a neighbouring lane"""
+        road = self.road.ravel()
+        occupied = self.road >= 0
+        flat = np.flatnonzero(occupied)
+        lanes, positions = np.divmod(flat, self.road_length)
+        velocities = road[flat].astype(np.int64)
+        ahead = gaps_ahead(occupied, self.boundary_type)
+        behind = gaps_behind(occupied, self.boundary_type)
+
+        own_gap = ahead[lanes, positions]
+        blocked = own_gap < velocities + 1
+        trying = draws < self.p_change
+        target = lanes.copy()
+        for direction in (1, -1):  # Left (overtaking) before right
+            candidate = np.clip(lanes + direction, 0, self.num_lanes - 1)
+            gap = ahead[candidate, positions]
+            if direction == 1 or self.lane_change == 'symmetric':
+                wanted = blocked & (gap > own_gap)
+            else:  # Keep right whenever the right lane does not slow the vehicle down
+                wanted = gap >= velocities + 1
+            safe = (~occupied[candidate, positions]
+                    & (behind[candidate, positions] >= self.max_velocity))
+            move = (wanted & safe & trying & (candidate != lanes) & (target == lanes)
+                    & self.lane_allowed(candidate, flat))
+            target[move] = candidate[move]
+
+        # Two vehicles may aim for the same cell from both sides; the left move wins
+        new_flat = target * self.road_length + positions
+        left = target > lanes
+        right = target < lanes
+        conflict = right & np.isin(new_flat, new_flat[left])
+        target[conflict] = lanes[conflict]
+        new_flat[conflict] = flat[conflict]
+
+        moved = target != lanes
+        for array in [self.road] + self._payload_arrays():
+            cells = array.ravel()
+            cells[new_flat[moved]] = cells[flat[moved]]
+        road[flat[moved]] = EMPTY
+        return int(moved.sum())
+
+    def get_window_density(self, start, end):
+        """Density over cells [start, end), averaged over the lanes"""
+        prefix = occupancy_prefix((self.road >= 0).sum(axis=0))
+        return window_densities(prefix, start, end) / self.num_lanes
+
+    def get_density_profile(self, window_size):
+        """Calculate density profile along the road"""
+        return self.get_window_density(*window_bounds(self.road_length, window_size))
+
+    def get_lane_densities(self):
+        """Fraction of occupied cells in each lane"""
+        return (self.road >= 0).mean(axis=1)
+
+    def vehicle_arrays(self):
+        """Return positions and velocities of all vehicles, lane by lane
+
+        Positions restart in every lane, so they are not sorted and may repeat;
+        ``vehicle_lanes()`` tells the lanes apart.
+        """
+        flat = np.flatnonzero(self.road >= 0)
+        return flat % self.road_length, self.road.ravel()[flat].astype(np.int64)
+
+    def vehicle_lanes(self):
+        """Return the lane of every vehicle, in the order of ``vehicle_arrays()``"""
+        return np.flatnonzero(self.road >= 0) // self.road_length
+
+    def update(self):
+        """Update the simulation state for one time step"""
+        n = int(np.count_nonzero(self.road >= 0))
+        uniforms = self.rng.random(self.draws_per_vehicle * n + 2 * self.num_lanes)
+        draws = uniforms[:self.draws_per_vehicle * n].reshape(self.draws_per_vehicle, n)
+        entrance = uniforms[self.draws_per_vehicle * n:].reshape(2, self.num_lanes)
+
+        # Stage 1: Lane changes
+        self.lane_change_history.append(self.change_lanes(draws[0]))
+
+        # Stage 2: Single-lane rules on every lane at once
+        occupied = self.road >= 0
+        flat = np.flatnonzero(occupied)
+        lanes, positions = np.divmod(flat, self.road_length)
+        velocities = self.road.ravel()[flat].astype(np.int64)
+        gaps = gaps_ahead(occupied, self.boundary_type)[lanes, positions]
+
+        # Step 1: Acceleration
+        v = self.accelerate(velocities, flat, draws)
+
+        # Step 2: Deceleration
+        v = np.minimum(v, gaps)
+
+        # Step 3: Randomization
+        v = self.randomize(v, velocities, flat, draws)
+
+        # Step 4: Movement
+        new_positions = positions + v
+        keep = slice(None)
+        if self.boundary_type == 'open':
+            # Vehicles that would pass the end leave with probability beta
+            at_exit = new_positions >= self.road_length - 1
+            leaves = at_exit & (draws[2] < self.beta)
+            keep = ~leaves
+            # Vehicles that reach the exit but do not leave stay where they are
+            new_positions = np.where(at_exit, positions, new_positions)
+        else:  # periodic boundary
+            new_positions %= self.road_length
+        new_flat = lanes[keep] * self.road_length + new_positions[keep]
+
+        payloads = [(array, array.ravel()[flat[keep]]) for array in self._payload_arrays()]
+        first_cells_free = self.road[:, 0] == EMPTY
+        self.road[:] = EMPTY
+        self.road.ravel()[new_flat] = v[keep]
+        for array, values in payloads:
+            array.ravel()[new_flat] = values
+
+        # Handle open boundary entrance, one draw per lane
+        if self.boundary_type == 'open':
+            enters = np.flatnonzero(first_cells_free & (entrance[0] < self.alpha))
+            self.road[enters, 0] = 0
+            self.enter_vehicles(enters, entrance[1, enters])
+
+        self.update_statistics()
+
+    def update_statistics(self):
+        """Update flow and density history"""
+        self.flow_history.append(self.get_current_flow())
+        self.density_history.append(self.get_current_density())
+
+    def get_current_density(self):
+        """Calculate current traffic density over all lanes"""
+        return np.count_nonzero(self.road >= 0) / self.road.size
+
+    def get_current_flow(self):
+        """Calculate current traffic flow per cell over all lanes"""
+        return int(np.maximum(self.road, 0).sum(dtype=np.int64)) / self.road.size
+
+    def get_state(self):
+        """Return current state: velocity cells per lane and type codes (or None)"""
+        return self.road, None
+
+
+class MultiLaneMixedVDRTrafficSimulation(MultiLaneVDRTrafficSimulation):
+    """Mixed traffic VDR model on several lanes.
+
+    Type codes (positions in ``VEHICLE_TYPE_CODES``) are kept per cell in
+    ``cell_types`` and move with the vehicles; ``vehicle_mix`` sets the
+    shares of the types as in the single-lane model. ``truck_lanes`` lists
+    the lanes trucks may use, e.g. ``[0]`` keeps them in the rightmost
+    lane: they are only placed there, only change lanes within them and
+    trucks drawn for any other lane enter as cars.
+    """
+
+    draws_per_vehicle = 4  # Lane change, slowdown, exit and recovery from a stop
+
+    def __init__(self, num_lanes, road_length, num_cars, max_velocity, p_slow, p0_slow,
+                 boundary_type='periodic', alpha=0.3, beta=0.3, truck_ratio=0.15,
+                 truck_lanes=None, lane_change='symmetric', p_change=1.0, seed=None,
+                 vehicle_mix=None):
+        self.cell_types = np.zeros((num_lanes, road_length), dtype=np.int8)
+        super().__init__(num_lanes, road_length, num_cars, max_velocity, p_slow, p0_slow,
+                         boundary_type, alpha, beta, lane_change, p_change, seed)
+        self.truck_ratio = truck_ratio
+        self.type_shares = vehicle_type_shares(truck_ratio, vehicle_mix)
+        self.truck_lanes = (np.arange(num_lanes) if truck_lanes is None
+                            else np.asarray(sorted(truck_lanes)))
+        self.truck_lane_mask = np.zeros(num_lanes, dtype=bool)
+        self.truck_lane_mask[self.truck_lanes] = True
+        self.vehicle_properties = build_vehicle_properties(max_velocity, p_slow, p0_slow)
+        self.type_tables = vehicle_parameter_tables(self.vehicle_properties)
+
+        self._initialize_mixed_vehicles()
+
+    def _initialize_mixed_vehicles(self):
+        """Turn shares of the vehicles into the other types, trucks in the truck lanes"""
+        flat = np.flatnonzero(self.road >= 0)
+        allowed = flat[self.truck_lane_mask[flat // self.road_length]]
+        car = VEHICLE_TYPE_CODES.index(VehicleType.CAR)
+        truck = VEHICLE_TYPE_CODES.index(VehicleType.TRUCK)
+        num_trucks = min(int(len(flat) * self.type_shares[truck]), len(allowed))
+        trucks = self.rng.choice(allowed, num_trucks, replace=False)
+        self.cell_types[:] = car
+        self.cell_types.flat[trucks] = truck
+
+        # The other types go to vehicles in any lane that are still cars
+        for code, share in enumerate(self.type_shares):
+            if code in (car, truck):
+                continue
+            cars = flat[self.cell_types.flat[flat] == car]
+            count = min(int(len(flat) * share), len(cars))
+            if count:
+                self.cell_types.flat[self.rng.choice(cars, count, replace=False)] = code
+
+        self.road.flat[flat] = np.minimum(
+            self.road.flat[flat], self.type_tables['max_velocity'][self.cell_types.flat[flat]])
+
+    def _payload_arrays(self):
+        """Per-cell arrays that travel with the vehicles"""
+        return [self.cell_types] + super()._payload_arrays()
+
+    def lane_allowed(self, lanes, flat):
+        """Trucks may only use the truck lanes"""
+        truck = VEHICLE_TYPE_CODES.index(VehicleType.TRUCK)
+        return (self.cell_types.flat[flat] != truck) | self.truck_lane_mask[lanes]
+
+    def accelerate(self, velocities, flat, draws):
+        """Step 1: Acceleration with recovery for stopped vehicles"""
+        types = self.cell_types.flat[flat]
+        recovered = draws[3] < self.type_tables['recovery_rate'][types]
+        moving = np.minimum(velocities + self.type_tables['acceleration'][types],
+                            self.type_tables['max_velocity'][types])
+        return np.where(velocities == 0, recovered, moving).astype(np.int64)
+
+    def randomize(self, v, velocities, flat, draws):
+        """Step 3: Randomization, only moving vehicles slow down"""
+        types = self.cell_types.flat[flat]
+        slow_down = (v > 0) & (draws[1] < self.type_tables['p_slow'][types])
+        return v - slow_down
+
+    def enter_vehicles(self, lanes, draws):
+        """Give new vehicles a random type; trucks only enter truck lanes"""
+        types = draw_vehicle_types(draws, self.type_shares)
+        outside = (types == VEHICLE_TYPE_CODES.index(VehicleType.TRUCK)) \
+            & ~self.truck_lane_mask[lanes]
+        self.cell_types[lanes, 0] = np.where(outside, VEHICLE_TYPE_CODES.index(VehicleType.CAR),
+                                             types)
+
+    def get_state(self):
+        """Return current state: velocity cells and type codes per lane"""
+        return self.road, self.cell_types
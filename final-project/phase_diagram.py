@@ -0,0 +1,187 @@
+"""Open-boundary phase diagrams over a grid of entry/exit probabilities.
+
+Each (alpha, beta) point runs in its own worker process and stops as soon
+as the density of the bulk (the middle of the road, away from the entrance
+and exit) has converged, instead of running a fixed number of steps.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+import argparse
+import numpy as np
+import matplotlib.pyplot as plt
+from compact_simulation import (CompactTrafficSimulation, CompactVDRTrafficSimulation,
+                                CompactMixedVDRTrafficSimulation)
+from fundamental_diagram import parse_grid
+
+PHASE_NAMES = ['Free flow', 'Congested', 'Maximal current']
+
+@dataclass
+class PhaseConfig:
+    """Parameters shared by every point of a phase diagram"""
+    road_length: int = 400
+    v_max: int = 5
+    p_slow: float = 0.4
+    p0_slow: float = 0.8
+    truck_ratio: float = 0.1
+    bulk_fraction: float = 0.5  # Middle part of the road used as the bulk
+    check_interval: int = 100   # Steps per batch between convergence checks
+    tolerance: float = 0.01     # Allowed change of the bulk density between batches
+    patience: int = 3           # Consecutive converged checks needed to stop
+    min_steps: int = 500
+    max_steps: int = 10000
+
+def create_open_simulation(model_type: str, alpha: float, beta: float,
+                           config: PhaseConfig, seed=None):
+    """Compact open-boundary simulation of the given model"""
+    if model_type == 'mvdr':
+        return CompactMixedVDRTrafficSimulation(
+            config.road_length, 0, config.v_max, config.p_slow, config.p0_slow,
+            'open', alpha, beta, config.truck_ratio, seed=seed)
+    if model_type == 'vdr':
+        return CompactVDRTrafficSimulation(
+            config.road_length, 0, config.v_max, config.p_slow, config.p0_slow,
+            'open', alpha, beta, seed=seed)
+    return CompactTrafficSimulation(
+        config.road_length, 0, config.v_max, config.p_slow, 'open', alpha, beta,
+        seed=seed)
+
+def run_phase_point(model_type: str, alpha: float, beta: float, config: PhaseConfig,
+                    seed_sequence: np.random.SeedSequence) -> Dict[str, float]:
+    """Simulate one (alpha, beta) point until its bulk density converges"""
+    sim = create_open_simulation(model_type, alpha, beta, config, seed_sequence)
+
+    margin = int(config.road_length * (1 - config.bulk_fraction) / 2)
+    bulk = (margin, config.road_length - margin)
+    batch_density, batch_flow = [], []
+    stable = 0
+    steps = 0
+
+    while steps < config.max_steps:
+        densities = np.empty(config.check_interval)
+        for i in range(config.check_interval):
+            sim.update()
+            densities[i] = sim.get_window_density(*bulk)
+        steps += config.check_interval
+        batch_density.append(densities.mean())
+        batch_flow.append(np.mean(sim.flow_history[-config.check_interval:]))
+
+        if len(batch_density) > 1 and \
+                abs(batch_density[-1] - batch_density[-2]) < config.tolerance:
+            stable += 1
+        else:
+            stable = 0
+        if stable >= config.patience and steps >= config.min_steps:
+            break
+
+    # Average over the batches that passed the convergence check
+    tail = max(1, stable + 1)
+    return {'density': float(np.mean(batch_density[-tail:])),
+            'flow': float(np.mean(batch_flow[-tail:])),
+            'steps': steps}
+
+def classify_phases(density: np.ndarray, flow: np.ndarray,
+                    current_fraction: float = 0.95) -> np.ndarray:
+    """Label points as free flow (0), congested (1) or maximal current (2)
+
+    Points whose flow is within ``current_fraction`` of the largest flow on
+    the grid are in the maximal-current phase; the rest are split by whether
+    their bulk density is below or above the density of that largest flow.
+    """
+    peak = np.unravel_index(np.argmax(flow), flow.shape)
+    critical_density = density[peak]
+    phases = np.where(density > critical_density, 1, 0)
+    phases[flow >= current_fraction * flow[peak]] = 2
+    return phases
+
+def generate_phase_diagram(model_type: str, alphas, betas,
+                           config: Optional[PhaseConfig] = None,
+                           workers: Optional[int] = None,
+                           seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Evaluate every (alpha, beta) grid point in a process pool"""
+    config = config or PhaseConfig()
+    alphas = np.asarray(alphas, dtype=float)
+    betas = np.asarray(betas, dtype=float)
+    points = [(alpha, beta) for alpha in alphas for beta in betas]
+    seeds = np.random.SeedSequence(seed).spawn(len(points))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_phase_point, model_type, alpha, beta, config, child)
+                   for (alpha, beta), child in zip(points, seeds)]
+        results = [future.result() for future in futures]
+
+    shape = (len(alphas), len(betas))
+    density = np.array([r['density'] for r in results]).reshape(shape)
+    flow = np.array([r['flow'] for r in results]).reshape(shape)
+    return {
+        'alphas': alphas,
+        'betas': betas,
+        'density': density,
+        'flow': flow,
+        'steps': np.array([r['steps'] for r in results]).reshape(shape),
+        'phase': classify_phases(density, flow)
+    }
+
+def plot_phase_diagram(result: Dict[str, np.ndarray], title: str,
+                       filename: str = 'phase_diagram.png'):
+    """Render bulk density and flow heat maps with the phase boundaries"""
+    fig, axes = plt.subplots(1, 2, figsize=(15, 6))
+    extent = [result['betas'][0], result['betas'][-1],
+              result['alphas'][0], result['alphas'][-1]]
+
+    for ax, key, label in zip(axes, ['density', 'flow'], ['Bulk Density', 'Flow']):
+        image = ax.imshow(result[key], origin='lower', extent=extent,
+                          aspect='auto', cmap='viridis')
+        if len(result['alphas']) > 1 and len(result['betas']) > 1:
+            ax.contour(result['betas'], result['alphas'], result['phase'],
+                       levels=[0.5, 1.5], colors='white', linewidths=1)
+        fig.colorbar(image, ax=ax, label=label)
+        ax.set_title(f"{title}: {label}")
+        ax.set_xlabel("Exit probability (beta)")
+        ax.set_ylabel("Entry probability (alpha)")
+
+    plt.tight_layout()
+    plt.savefig(filename, dpi=300, bbox_inches='tight')
+    print(f"\nPhase diagram saved as {filename}")
+    plt.close()
+
+def main():
+    """Command-line entry point"""
+    defaults = PhaseConfig()
+    parser = argparse.ArgumentParser(description="Open-boundary (alpha, beta) phase diagram")
+    parser.add_argument('--model', default='basic', choices=['basic', 'vdr', 'mvdr'])
+    parser.add_argument('--alphas', default='0.05:1.0:0.05',
+                        help="start:stop:step or comma-separated values")
+    parser.add_argument('--betas', default='0.05:1.0:0.05',
+                        help="start:stop:step or comma-separated values")
+    parser.add_argument('--road-length', type=int, default=defaults.road_length)
+    parser.add_argument('--v-max', type=int, default=defaults.v_max)
+    parser.add_argument('--p-slow', type=float, default=defaults.p_slow)
+    parser.add_argument('--p0-slow', type=float, default=defaults.p0_slow)
+    parser.add_argument('--truck-ratio', type=float, default=defaults.truck_ratio)
+    parser.add_argument('--tolerance', type=float, default=defaults.tolerance)
+    parser.add_argument('--max-steps', type=int, default=defaults.max_steps)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default='phase_diagram')
+    args = parser.parse_args()
+
+    config = PhaseConfig(
+        road_length=args.road_length,
+        v_max=args.v_max,
+        p_slow=args.p_slow,
+        p0_slow=args.p0_slow,
+        truck_ratio=args.truck_ratio,
+        tolerance=args.tolerance,
+        max_steps=args.max_steps
+    )
+    result = generate_phase_diagram(args.model, parse_grid(args.alphas),
+                                    parse_grid(args.betas), config,
+                                    args.workers, args.seed)
+    np.savez_compressed(f"{args.output}.npz", **result)
+    print(f"\nPhase diagram data saved as {args.output}.npz "
+          f"(mean steps per point: {result['steps'].mean():.0f})")
+    plot_phase_diagram(result, args.model.upper(), f"{args.output}.png")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Road networks of open segments connected by junctions.
+
+Every segment is an open-boundary compact engine. Junctions pass vehicles
+from the exits of their incoming segments to the entrances of their
+outgoing segments, choosing the outgoing segment with the routing
+probabilities; when several vehicles compete for one entrance (a merge),
+they are served in random order. Segments without an incoming junction
+are fed with probability ``alpha``, and vehicles leave segments without an
+outgoing junction with probability ``beta``.
+
+The segments are split into partitions of similar total length, each
+simulated by its own worker process. Per step the network only exchanges
+the boundary transfers with every worker: which exits may release a
+vehicle, the vehicles arriving at each entrance, and back the departures
+and whether each entrance is free. The random draws of every segment come
+from its own seed stream, so results do not depend on the number of
+workers.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import argparse
+import multiprocessing
+import numpy as np
+from compact_simulation import (EMPTY, CompactTrafficSimulation, CompactVDRTrafficSimulation,
+                                CompactMixedVDRTrafficSimulation)
+
+@dataclass
+class SegmentSpec:
+    """Everything a worker needs to build one segment"""
+    name: str
+    length: int
+    model_type: str
+    params: Dict[str, Any]
+    seed: Any = None
+
+@dataclass
+class Junction:
+    """Node passing vehicles from incoming to outgoing segments"""
+    incoming: List[str]
+    outgoing: List[str]
+    probabilities: List[float] = field(default_factory=list)  # Routing per outgoing segment
+
+def create_segment(spec: SegmentSpec):
+    """Build the open-boundary compact engine of a segment"""
+    common = dict(road_length=spec.length, num_cars=0, max_velocity=spec.params['v_max'],
+                  p_slow=spec.params['p_slow'], boundary_type='open',
+                  alpha=spec.params['alpha'], beta=spec.params['beta'], seed=spec.seed)
+    if spec.model_type == 'mvdr':
+        return CompactMixedVDRTrafficSimulation(p0_slow=spec.params['p0_slow'],
+                                                truck_ratio=spec.params['truck_ratio'],
+                                                **common)
+    if spec.model_type == 'vdr':
+        return CompactVDRTrafficSimulation(p0_slow=spec.params['p0_slow'], **common)
+    return CompactTrafficSimulation(**common)
+
+def partition_segments(specs: List[SegmentSpec], num_partitions: int):
+    """Split segments into partitions of similar total length (longest first)"""
+    partitions = [[] for _ in range(num_partitions)]
+    loads = np.zeros(num_partitions, dtype=np.int64)
+    for spec in sorted(specs, key=lambda spec: -spec.length):
+        lightest = int(np.argmin(loads))
+        partitions[lightest].append(spec)
+        loads[lightest] += spec.length
+    return [partition for partition in partitions if partition]
+
+class Partition:
+    """The segments simulated by one worker"""
+
+    def __init__(self, specs: List[SegmentSpec]):
+        self.segments = {spec.name: create_segment(spec) for spec in specs}
+
+    def step(self, arrivals, gates):
+        """Insert arriving vehicles, advance every segment and report its boundaries"""
+        for name, vehicles in arrivals.items():
+            for velocity, payload in vehicles:
+                self.segments[name].insert_vehicle(velocity, payload)
+
+        boundaries = {}
+        for name, segment in self.segments.items():
+            segment.beta = gates[name]
+            segment.exited = None
+            segment.update()
+            departures = []
+            if segment.exited is not None:
+                velocities, payloads = segment.exited
+                departures = [(int(v), tuple(values[i] for values in payloads))
+                              for i, v in enumerate(velocities)]
+            boundaries[name] = (bool(segment.cells[0] == EMPTY), departures,
+                                segment.vehicle_count, segment.speed_sum)
+        return boundaries
+
+    def get_segments(self):
+        """Return the segment engines, e.g. for analysis after a run"""
+        return self.segments
+
+def partition_worker(connection, specs):
+    """Serve ``(method, args)`` requests on a partition until ``None`` arrives"""
+    partition = Partition(specs)
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, args = request
+        connection.send(getattr(partition, method)(*args))
+    connection.close()
+
+class RoadNetwork:
+    """Graph of road segments connected by junctions, run in worker processes"""
+
+    def __init__(self, model_type='vdr', v_max=5, p_slow=0.3, p0_slow=0.6,
+                 alpha=0.3, beta=0.3, truck_ratio=0.1, seed=None):
+        self.model_type = model_type
+        self.params = dict(v_max=v_max, p_slow=p_slow, p0_slow=p0_slow, alpha=alpha,
+                           beta=beta, truck_ratio=truck_ratio)
+        self.seed = seed
+        self.rng = None
+        self.lengths = {}
+        self.junctions = []
+        self.workers = []  # (process or None, connection or partition, segment names)
+        self.step_count = 0
+
+        # Track statistics
+        self.flow_history = []
+        self.density_history = []
+
+    def add_segment(self, name: str, length: int):
+        """Add an empty road segment"""
+        if name in self.lengths:
+            raise ValueError(f"Duplicate segment: {name}")
+        self.lengths[name] = length
+
+    def add_junction(self, incoming: List[str], outgoing: List[str],
+                     probabilities: Optional[List[float]] = None):
+        """Connect segments; ``probabilities`` default to an even split"""
+        for name in incoming + outgoing:
+            if name not in self.lengths:
+                raise ValueError(f"Unknown segment: {name}")
+        if probabilities is None:
+            probabilities = [1 / len(outgoing)] * len(outgoing)
+        if len(probabilities) != len(outgoing) or not np.isclose(sum(probabilities), 1):
+            raise ValueError("Need one routing probability per outgoing segment, summing to 1")
+        self.junctions.append(Junction(incoming, outgoing, list(probabilities)))
+
+    def start(self, workers: Optional[int] = None):
+        """Create the segments, in ``workers`` processes (0 or 1: in this process)"""
+        fed = {name for junction in self.junctions for name in junction.outgoing}
+        draining = {name for junction in self.junctions for name in junction.incoming}
+        seeds = np.random.SeedSequence(self.seed).spawn(len(self.lengths) + 1)
+        self.rng = np.random.default_rng(seeds[-1])  # Routing and merge order
+
+        specs = []
+        for (name, length), seed in zip(self.lengths.items(), seeds):
+            params = dict(self.params)
+            params['alpha'] = 0.0 if name in fed else params['alpha']
+            specs.append(SegmentSpec(name, length, self.model_type, params, seed))
+        self.sinks = [name for name in self.lengths if name not in draining]
+        self.entry_free = {name: True for name in self.lengths}
+        self.arrivals = {}
+        self.totals = {name: (0, 0) for name in self.lengths}
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers <= 1:
+            self.workers = [(None, Partition(specs), list(self.lengths))]
+            return self
+        for partition in partition_segments(specs, workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=partition_worker,
+                                              args=(child, partition), daemon=True)
+            process.start()
+            child.close()
+            self.workers.append((process, parent, [spec.name for spec in partition]))
+        return self
+
+    def _call(self, method, args_per_worker):
+        """Run ``method`` on every partition and merge the replies"""
+        results = {}
+        for (process, handle, _), args in zip(self.workers, args_per_worker):
+            if process is None:
+                results.update(getattr(handle, method)(*args))
+            else:
+                handle.send((method, args))
+        for process, handle, _ in self.workers:
+            if process is not None:
+                results.update(handle.recv())
+        return results
+
+    def route(self):
+        """Decide which exits may release a vehicle into which entrance this step"""
+        gates = {name: 0.0 for name in self.lengths}
+        for name in self.sinks:
+            gates[name] = self.params['beta']
+        routes = {}
+        free = {name: self.entry_free[name] and name not in self.arrivals
+                for name in self.lengths}
+        for junction in self.junctions:
+            for name in self.rng.permutation(junction.incoming):
+                target = junction.outgoing[
+                    self.rng.choice(len(junction.outgoing), p=junction.probabilities)]
+                if free[target]:
+                    free[target] = False  # Claimed for the vehicle leaving ``name``
+                    gates[name] = 1.0
+                    routes[name] = target
+        return gates, routes
+
+    def update(self):
+        """Advance every segment by one step and pass vehicles through the junctions"""
+        gates, routes = self.route()
+        boundaries = self._call('step', [
+            ({name: self.arrivals[name] for name in names if name in self.arrivals},
+             {name: gates[name] for name in names})
+            for _, _, names in self.workers])
+
+        self.arrivals = {}
+        for name, (entry_free, departures, count, speed_sum) in boundaries.items():
+            self.entry_free[name] = entry_free
+            self.totals[name] = (count, speed_sum)
+            if departures and name in routes:
+                self.arrivals.setdefault(routes[name], []).extend(departures)
+        self.step_count += 1
+        self.update_statistics()
+
+    def run(self, steps: int):
+        """Advance the network by ``steps`` steps"""
+        for _ in range(steps):
+            self.update()
+
+    def update_statistics(self):
+        """Update flow and density history of the whole network"""
+        self.flow_history.append(self.get_current_flow())
+        self.density_history.append(self.get_current_density())
+
+    def get_current_density(self):
+        """Vehicles per cell over all segments"""
+        return sum(count for count, _ in self.totals.values()) / sum(self.lengths.values())
+
+    def get_current_flow(self):
+        """Sum of velocities per cell over all segments"""
+        return sum(speed for _, speed in self.totals.values()) / sum(self.lengths.values())
+
+    def get_segments(self):
+        """Collect the segment engines from all partitions"""
+        return self._call('get_segments', [()] * len(self.workers))
+
+    def close(self):
+        """Stop the worker processes"""
+        for process, handle, _ in self.workers:
+            if process is not None:
+                handle.send(None)
+                process.join()
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def build_corridor(network: RoadNetwork, sections: int, length: int, ramp_length: int,
+                   exit_probability=0.2):
+    """Main road of ``sections`` segments with an on-ramp merging at every
+    junction and an off-ramp taking ``exit_probability`` of the traffic"""
+    for i in range(sections):
+        network.add_segment(f'main_{i}', length)
+    for i in range(1, sections):
+        network.add_segment(f'on_{i}', ramp_length)
+        network.add_segment(f'off_{i}', ramp_length)
+        network.add_junction([f'main_{i - 1}', f'on_{i}'], [f'main_{i}', f'off_{i}'],
+                             [1 - exit_probability, exit_probability])
+    return network
+
+def main():
+    """Simulate a corridor with merges and diverges"""
+    parser = argparse.ArgumentParser(description="Simulate a road network")
+    parser.add_argument('--model', choices=['basic', 'vdr', 'mvdr'], default='vdr')
+    parser.add_argument('--sections', type=int, default=8)
+    parser.add_argument('--length', type=int, default=1000)
+    parser.add_argument('--ramp-length', type=int, default=200)
+    parser.add_argument('--exit-probability', type=float, default=0.2)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--alpha', type=float, default=0.3)
+    parser.add_argument('--beta', type=float, default=0.9)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    network = RoadNetwork(args.model, alpha=args.alpha, beta=args.beta, seed=args.seed)
+    build_corridor(network, args.sections, args.length, args.ramp_length,
+                   args.exit_probability)
+    with network.start(args.workers):
+        network.run(args.steps)
+        segments = network.get_segments()
+
+    print(f"\nNetwork flow: {np.mean(network.flow_history):.3f}, "
+          f"density: {np.mean(network.density_history):.3f}")
+    for name in network.lengths:
+        segment = segments[name]
+        print(f"{name}: flow {np.mean(segment.flow_history):.3f}, "
+              f"density {np.mean(segment.density_history):.3f}")
+
+if __name__ == "__main__":
+    main()
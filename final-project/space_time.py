@@ -0,0 +1,114 @@
+"""Space-time diagrams recorded straight to disk.
+
+Every step's velocity row is written into a preallocated ``np.memmap`` of
+shape (steps, cells) with one signed byte per cell (``EMPTY`` for empty
+cells), so a 10^4 x 10^4 diagram takes about 100 MB of disk and almost no
+RAM. On close the file is cut down to the rows actually recorded. The
+whole diagram is rendered afterwards with a single ``imshow`` of a strided
+view, so no more rows and columns are read than the image can show.
+"""
+import matplotlib.pyplot as plt
+import numpy as np
+
+EMPTY = -1  # Cell value of an empty cell
+
+def velocity_row(simulation, row):
+    """Fill ``row`` with the velocity of each cell, or ``EMPTY``"""
+    row[:] = EMPTY
+    if hasattr(simulation, 'vehicle_arrays'):
+        positions, velocities = simulation.vehicle_arrays()
+        row[positions] = velocities
+        return
+
+    # Reference models keep car IDs on the road and velocities in a dict
+    road = np.asarray(simulation.road)
+    positions = np.flatnonzero(road)
+    row[positions] = [simulation.velocities[car_id] for car_id in road[positions]]
+
+def load_space_time(filename, road_length):
+    """Open a recorded diagram read-only as a (steps, cells) array"""
+    return np.memmap(filename, dtype=np.int8, mode='r').reshape(-1, road_length)
+
+def plot_space_time(data, title, max_velocity, filename='space_time.png',
+                    max_pixels=2000):
+    """Render a (steps, cells) velocity array with one ``imshow`` call
+
+    Rows and columns are strided down to at most ``max_pixels`` each; the
+    axes keep the original step and position coordinates.
+    """
+    steps, cells = data.shape
+    row_step = -(-steps // max_pixels)
+    col_step = -(-cells // max_pixels)
+
+    cmap = plt.get_cmap('viridis_r').copy()
+    cmap.set_under('white')  # Empty cells
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    image = ax.imshow(data[::row_step, ::col_step], cmap=cmap, vmin=0,
+                      vmax=max_velocity, aspect='auto', interpolation='nearest',
+                      origin='upper', extent=[0, cells, steps, 0])
+    fig.colorbar(image, ax=ax, label='Velocity')
+    ax.set_title(f"{title}: Space-Time Diagram")
+    ax.set_xlabel("Position")
+    ax.set_ylabel("Time step")
+
+    fig.savefig(filename, dpi=150, bbox_inches='tight')
+    print(f"\nSpace-time diagram saved as {filename}")
+    plt.close(fig)
+
+class SpaceTimeRecorder:
+    """Records one velocity row per simulation step into a memory-mapped file"""
+
+    def __init__(self, simulation, steps, filename='space_time.dat', start=0):
+        if getattr(simulation, 'num_lanes', 1) > 1:
+            raise ValueError("Space-time diagrams can only be recorded on a single lane")
+        self.simulation = simulation
+        self.filename = filename
+        if start:
+            # Continue a resumed recording: keep its first ``start`` rows
+            with open(filename, 'r+b') as f:
+                f.truncate(steps * simulation.road_length)
+            self.data = np.memmap(filename, dtype=np.int8, mode='r+',
+                                  shape=(steps, simulation.road_length))
+        else:
+            self.data = np.memmap(filename, dtype=np.int8, mode='w+',
+                                  shape=(steps, simulation.road_length))
+        self.data[start:] = EMPTY  # Rows that are never recorded stay empty road
+        self.recorded = start
+
+    def attach(self):
+        """Record a row after every call of ``simulation.update()``"""
+        update = self.simulation.update
+
+        def recorded_update():
+            update()
+            self.record()
+
+        self.simulation.update = recorded_update
+        return self
+
+    def record(self):
+        """Write the current state as the next row; extra steps are not kept"""
+        if self.recorded < len(self.data):
+            velocity_row(self.simulation, self.data[self.recorded])
+            self.recorded += 1
+
+    def resume_state(self):
+        """Flush the rows so far and return what a resumed recorder needs (``start``)"""
+        self.data.flush()
+        return self.recorded
+
+    def render(self, title, filename='space_time.png'):
+        """Draw the rows recorded so far and close the recording"""
+        self.data.flush()
+        if self.recorded:
+            plot_space_time(self.data[:self.recorded], title,
+                            self.simulation.max_velocity, filename)
+        self.close()
+
+    def close(self):
+        """Cut the file down to the recorded rows, so readers only see real steps"""
+        self.data.flush()
+        self.data = None
+        with open(self.filename, 'r+b') as f:
+            f.truncate(self.recorded * self.simulation.road_length)
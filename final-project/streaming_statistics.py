@@ -0,0 +1,97 @@
+import numpy as np
+
+class StatisticsStream:
+    """Fixed-memory replacement for an ever-growing history list.
+
+    Values (scalars or fixed-length vectors such as density profiles) are
+    folded into online accumulators for the count, mean, variance and
+    extremes (Welford's algorithm), and only the most recent ``retention``
+    values are kept in a ring buffer. It supports ``append``, ``len`` and
+    indexing/slicing over the retained window, so code written for lists
+    keeps working.
+    """
+
+    def __init__(self, retention=1000):
+        self.retention = retention
+        self.count = 0
+        self._mean = None
+        self._m2 = None
+        self._min = None
+        self._max = None
+        self._buffer = None
+        self._next = 0  # Ring buffer slot of the next value
+
+    def append(self, value):
+        """Fold a new value into the accumulators and the recent window"""
+        value = np.asarray(value, dtype=np.float64)
+        if self.count == 0:
+            self._mean = np.zeros_like(value)
+            self._m2 = np.zeros_like(value)
+            self._min = value.copy()
+            self._max = value.copy()
+            self._buffer = np.empty((self.retention,) + value.shape)
+
+        self.count += 1
+        delta = value - self._mean
+        self._mean = self._mean + delta / self.count
+        self._m2 = self._m2 + delta * (value - self._mean)
+        self._min = np.minimum(self._min, value)
+        self._max = np.maximum(self._max, value)
+
+        if self.retention > 0:
+            self._buffer[self._next] = value
+            self._next = (self._next + 1) % self.retention
+
+    def recent(self):
+        """Retained values, oldest first"""
+        if self._buffer is None:
+            return np.empty(0)
+        if self.count < self.retention:
+            return self._buffer[:self.count]
+        return np.roll(self._buffer, -self._next, axis=0)
+
+    def __len__(self):
+        return min(self.count, self.retention)
+
+    def __getitem__(self, key):
+        return self.recent()[key]
+
+    def __iter__(self):
+        return iter(self.recent())
+
+    @property
+    def mean(self):
+        return self._mean if self.count else np.nan
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def min(self):
+        return self._min if self.count else np.nan
+
+    @property
+    def max(self):
+        return self._max if self.count else np.nan
+
+    def summary(self):
+        """Accumulated statistics of every value seen so far"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'variance': self.variance,
+            'min': self.min,
+            'max': self.max
+        }
+
+
+def enable_streaming(simulation, retention=1000):
+    """Swap a simulation's flow/density history lists for bounded streams"""
+    simulation.flow_history = StatisticsStream(retention)
+    simulation.density_history = StatisticsStream(retention)
+    return simulation
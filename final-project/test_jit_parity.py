@@ -0,0 +1,38 @@
+"""Parity of the compiled Mixed VDR update with the pure-Python model."""
+import numpy as np
+import pytest
+import jit_simulation
+from jit_simulation import JITMixedVDRTrafficSimulation
+from traffic_simulation import MixedVDRTrafficSimulation
+
+def make_pair(boundary_type, seed=7):
+    """The reference model and its JIT counterpart with the same parameters and seed"""
+    params = dict(road_length=120, num_cars=60, max_velocity=5, p_slow=0.3, p0_slow=0.6,
+                  boundary_type=boundary_type, alpha=0.6, beta=0.5, truck_ratio=0.3,
+                  seed=seed)
+    return MixedVDRTrafficSimulation(**params), JITMixedVDRTrafficSimulation(**params)
+
+def assert_same_state(reference, jit):
+    """Occupied cells, velocities and vehicle types agree"""
+    positions, velocities = reference.vehicle_arrays()
+    jit_positions, jit_velocities = jit.vehicle_arrays()
+    np.testing.assert_array_equal(positions, jit_positions)
+    np.testing.assert_array_equal(velocities, jit_velocities)
+    np.testing.assert_array_equal(reference.cell_types, jit.cell_types)
+
+@pytest.mark.parametrize('boundary_type', ['open', 'periodic', 'closed'])
+def test_jit_matches_reference(boundary_type):
+    reference, jit = make_pair(boundary_type)
+    for _ in range(500):
+        reference.update()
+        jit.update()
+        assert_same_state(reference, jit)
+
+def test_fallback_without_numba(monkeypatch):
+    monkeypatch.setattr(jit_simulation, 'NUMBA_AVAILABLE', False)
+    reference, jit = make_pair('open')
+    assert not jit.use_jit
+    for _ in range(200):
+        reference.update()
+        jit.update()
+        assert_same_state(reference, jit)
@@ -1,44 +1,188 @@
 from dataclasses import dataclass
+from statistics import NormalDist
+import math
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from streaming_statistics import StatisticsStream
+
+def t_critical(df: int, confidence: float = 0.95) -> float:
+    """Two-sided Student-t critical value without a SciPy dependency"""
+    p = 0.5 + confidence / 2
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    
+    # Cornish-Fisher expansion around the normal quantile
+    z = NormalDist().inv_cdf(p)
+    return (z
+            + (z**3 + z) / (4 * df)
+            + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+            + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z)
+            / (92160 * df**4))
+
+def confidence_interval(samples, confidence: float = 0.95) -> Tuple[float, float]:
+    """Return the mean and confidence-interval half-width of independent samples"""
+    samples = np.asarray(samples, dtype=float)
+    mean = float(np.mean(samples))
+    if len(samples) < 2:
+        return mean, float('nan')
+    sem = np.std(samples, ddof=1) / math.sqrt(len(samples))
+    return mean, float(t_critical(len(samples) - 1, confidence) * sem)
+
+def difference_interval(first, second, confidence: float = 0.95) -> Tuple[float, float]:
+    """Welch's test: difference of the means of two independent samples and its
+    confidence half-width; the difference is significant if it exceeds the width"""
+    first = np.asarray(first, dtype=float)
+    second = np.asarray(second, dtype=float)
+    difference = float(np.mean(first) - np.mean(second))
+    if len(first) < 2 or len(second) < 2:
+        return difference, float('nan')
+    first_var = np.var(first, ddof=1) / len(first)
+    second_var = np.var(second, ddof=1) / len(second)
+    se = math.sqrt(first_var + second_var)
+    if se == 0:
+        return difference, 0.0
+    
+    # Welch-Satterthwaite degrees of freedom
+    df = (first_var + second_var) ** 2 / (first_var ** 2 / (len(first) - 1)
+                                          + second_var ** 2 / (len(second) - 1))
+    return difference, float(t_critical(max(1, round(df)), confidence) * se)
+
+def mser_warmup(series, batch_size: int = 5) -> int:
+    """Warm-up length by MSER-``batch_size``: the truncation point (in steps)
+    that minimizes the standard error of the mean of the remaining batches"""
+    series = np.asarray(series, dtype=float)
+    num_batches = len(series) // batch_size
+    if num_batches < 2:
+        return 0
+    batches = series[:num_batches * batch_size].reshape(num_batches, batch_size).mean(axis=1)
+    
+    # Suffix sums give the squared error of every truncated tail at once
+    remaining = np.arange(num_batches, 0, -1)
+    sums = np.cumsum(batches[::-1])[::-1]
+    squares = np.cumsum(batches[::-1] ** 2)[::-1]
+    mser = (squares - sums ** 2 / remaining) / remaining ** 2
+    
+    # Truncating more than half the run means no steady state was reached yet
+    return int(np.argmin(mser[:num_batches // 2 + 1])) * batch_size
+
+def batch_means_interval(series, num_batches: int = 20,
+                         confidence: float = 0.95) -> Tuple[float, float]:
+    """Mean and confidence half-width of a correlated series from the means of
+    ``num_batches`` consecutive batches (the oldest leftover values are dropped)"""
+    series = np.asarray(series, dtype=float)
+    batch_size = len(series) // num_batches
+    if batch_size == 0:
+        return float(np.mean(series)) if len(series) else float('nan'), float('nan')
+    batches = series[len(series) - batch_size * num_batches:]
+    return confidence_interval(batches.reshape(num_batches, batch_size).mean(axis=1),
+                               confidence)
+
+# Scalar series of ModelMetrics, in row order of its value array
+SERIES = ['flow_rates', 'densities', 'avg_velocities', 'jam_frequencies', 'time_steps']
+
+def _series(name):
+    """Filled view of one preallocated series, or its stream"""
+    index = SERIES.index(name)
+    return property(lambda self: self._streams[name] if self.retention is not None
+                    else self._values[index, :self.count])
 
 @dataclass
 class ModelMetrics:
-    """Container for model metrics"""
-    flow_rates: List[float] = None
-    densities: List[float] = None
-    avg_velocities: List[float] = None
-    jam_frequencies: List[float] = None
-    time_steps: List[int] = None
-    density_profiles: List[List[float]] = None
+    """Container for model metrics
+    
+    The scalar series are rows of one array preallocated to ``capacity``
+    steps and the density profiles are rows of a (steps x windows) array;
+    the series attributes are views of the filled part. With ``retention``
+    set, each series is a ``StatisticsStream`` that keeps only the most
+    recent ``retention`` values plus running accumulators, so memory stays
+    bounded however long the run is.
+    
+    ``warmup`` steps at the start are left out of the averages once
+    ``detect_warmup`` has found the end of the initial transient. The
+    accumulators of streamed series cover every step, so they keep it at 0.
+    """
+    retention: Optional[int] = None
+    capacity: int = 1000  # Preallocated steps
+    
+    flow_rates = _series('flow_rates')
+    densities = _series('densities')
+    avg_velocities = _series('avg_velocities')
+    jam_frequencies = _series('jam_frequencies')
+    time_steps = _series('time_steps')
     
     def __post_init__(self):
-        """Initialize empty lists"""
-        self.flow_rates = []
-        self.densities = []
-        self.avg_velocities = []
-        self.jam_frequencies = []
-        self.time_steps = []
-        self.density_profiles = []
+        """Initialize empty series"""
+        self.count = 0
+        self.warmup = 0  # Leading steps excluded from the averages
+        if self.retention is None:
+            self._values = np.empty((len(SERIES), max(1, self.capacity)))
+            self._profiles = None  # Allocated once the profile length is known
+        else:
+            self._streams = {name: StatisticsStream(self.retention)
+                             for name in SERIES + ['density_profiles']}
+    
+    @property
+    def density_profiles(self):
+        """Density profile per step, one row each"""
+        if self.retention is not None:
+            return self._streams['density_profiles']
+        if self._profiles is None:
+            return np.empty((0, 0))
+        return self._profiles[:self.count]
+    
+    def append(self, step, flow_rate, density, avg_velocity, jam_frequency, profile):
+        """Store the metrics of one step"""
+        if self.retention is not None:
+            values = [flow_rate, density, avg_velocity, jam_frequency, step]
+            for name, value in zip(SERIES, values):
+                self._streams[name].append(value)
+            self._streams['density_profiles'].append(profile)
+            self.count += 1
+            return
+        
+        if self._profiles is None:
+            self._profiles = np.empty((self._values.shape[1], len(profile)))
+        elif self.count == self._values.shape[1]:
+            # Ran past the configured step count, grow geometrically
+            self._values = np.concatenate([self._values, np.empty_like(self._values)], axis=1)
+            self._profiles = np.concatenate([self._profiles, np.empty_like(self._profiles)])
+        self._values[:, self.count] = flow_rate, density, avg_velocity, jam_frequency, step
+        self._profiles[self.count] = profile
+        self.count += 1
     
     def get_averages(self) -> Dict[str, float]:
         """Calculate average metrics"""
-        return {
-            'flow_rate': np.mean(self.flow_rates),
-            'density': np.mean(self.densities),
-            'velocity': np.mean(self.avg_velocities),
-            'jam_frequency': np.mean(self.jam_frequencies)
-        }
+        if self.retention is not None:
+            means = [self._streams[name].mean for name in SERIES[:4]]
+        elif self.count:
+            means = self._values[:4, self.warmup:self.count].mean(axis=1).tolist()
+        else:
+            means = [np.nan] * 4
+        return dict(zip(['flow_rate', 'density', 'velocity', 'jam_frequency'], means))
+    
+    def detect_warmup(self, batch_size: int = 5) -> int:
+        """Find the end of the initial transient of the flow (MSER) and drop it"""
+        if self.retention is None:
+            self.warmup = mser_warmup(self.flow_rates, batch_size)
+        return self.warmup
+    
+    def flow_interval(self, confidence: float = 0.95,
+                      num_batches: int = 20) -> Tuple[float, float]:
+        """Batch-means mean and confidence half-width of the flow after the warm-up"""
+        return batch_means_interval(self.flow_rates[self.warmup:], num_batches, confidence)
 
 class TrafficAnalyzer:
     """Analyzes and visualizes traffic simulation data"""
     
-    def __init__(self):
+    def __init__(self, retention: Optional[int] = None, steps: int = 1000):
         self.metrics = {
-            'basic': ModelMetrics(),
-            'vdr': ModelMetrics(),
-            'mvdr': ModelMetrics()
+            'basic': ModelMetrics(retention=retention, capacity=steps),
+            'vdr': ModelMetrics(retention=retention, capacity=steps),
+            'mvdr': ModelMetrics(retention=retention, capacity=steps)
         }
         self.plot_colors = {
             'basic': 'skyblue',
@@ -50,6 +194,8 @@ class TrafficAnalyzer:
             'vdr': 'VDR',
             'mvdr': 'Mixed VDR'
         }
+        self.replica_averages = {}  # Per-replica averages by model, if replicated
+        self.replica_warmups = {}  # Per-replica (warm-up, steps) by model, if replicated
     
     def collect_metrics(self, simulation, model_type: str, step: int):
         """Collect metrics for each time step"""
@@ -59,20 +205,59 @@ class TrafficAnalyzer:
         density = simulation.get_current_density()
         flow = simulation.get_current_flow()
         
-        if simulation.velocities:
-            avg_velocity = sum(simulation.velocities.values()) / len(simulation.velocities)
-            jam_count = sum(1 for v in simulation.velocities.values() if v == 0)
-            jam_freq = jam_count / len(simulation.velocities)
+        # Reduce over the velocity array of the engine's state
+        if hasattr(simulation, 'vehicle_arrays'):
+            _, velocities = simulation.vehicle_arrays()
+        else:
+            velocities = np.fromiter(simulation.velocities.values(), dtype=np.int64,
+                                     count=len(simulation.velocities))
+        if len(velocities):
+            avg_velocity = velocities.sum() / len(velocities)
+            jam_freq = np.count_nonzero(velocities == 0) / len(velocities)
         else:
             avg_velocity = jam_freq = 0
-            
-        # Store metrics
-        metrics.densities.append(density)
-        metrics.flow_rates.append(flow)
-        metrics.avg_velocities.append(avg_velocity)
-        metrics.jam_frequencies.append(jam_freq)
-        metrics.time_steps.append(step)
-        metrics.density_profiles.append(simulation.get_density_profile(10))
+        
+        metrics.append(step, flow, density, avg_velocity, jam_freq,
+                       simulation.get_density_profile(10))
+
+    def add_replicas(self, model_type: str, replica_metrics: List[ModelMetrics]):
+        """Keep the averages of independent replicas of a model; the first
+        replica's metrics stand in for the series-based plots"""
+        averages = [metrics.get_averages() for metrics in replica_metrics]
+        self.replica_averages[model_type] = {
+            metric: np.array([a[metric] for a in averages]) for metric in averages[0]}
+        self.replica_warmups[model_type] = [(metrics.warmup, metrics.count)
+                                            for metrics in replica_metrics]
+        self.metrics[model_type] = replica_metrics[0]
+    
+    def get_model_averages(self, model_type: str,
+                           confidence: float = 0.95) -> Dict[str, Tuple[float, float]]:
+        """Mean and confidence half-width of every average over the replicas
+        (half-width NaN for a single run)"""
+        if model_type in self.replica_averages:
+            return {metric: confidence_interval(values, confidence)
+                    for metric, values in self.replica_averages[model_type].items()}
+        return {metric: (value, float('nan'))
+                for metric, value in self.metrics[model_type].get_averages().items()}
+    
+    def compare_models(self, confidence: float = 0.95) -> Dict[Tuple[str, str], Dict]:
+        """Welch's test of every metric for every pair of replicated models"""
+        models = [m for m in ['basic', 'vdr', 'mvdr'] if m in self.replica_averages]
+        comparisons = {}
+        for i, first in enumerate(models):
+            for second in models[i + 1:]:
+                comparisons[first, second] = {
+                    metric: difference_interval(values, self.replica_averages[second][metric],
+                                                confidence)
+                    for metric, values in self.replica_averages[first].items()}
+        return comparisons
+    
+    def summarize_ensemble(self, simulation, warmup: int = 0,
+                           confidence: float = 0.95) -> Dict[str, Tuple[float, float]]:
+        """Mean and confidence half-width of per-replica averages of an ensemble"""
+        averages = simulation.get_replica_averages(warmup)
+        return {metric: confidence_interval(values, confidence)
+                for metric, values in averages.items()}
 
     def analyze_spatial_patterns(self):
         """Analyze how density varies along the road"""
@@ -80,8 +265,11 @@ class TrafficAnalyzer:
         
         for model_type in self.metrics.keys():
             # Get the last 50 density profiles
-            profiles = np.array(self.metrics[model_type].density_profiles[-50:])
-            avg_profile = np.mean(profiles, axis=0)
+            profiles = self.metrics[model_type].density_profiles[-50:]
+            if len(profiles):
+                avg_profile = profiles.mean(axis=0)
+            else:  # Streaming metrics without retained profiles
+                avg_profile = self.metrics[model_type].density_profiles.mean
             
             # Plot spatial density distribution
             x = np.linspace(0, 100, len(avg_profile))
@@ -115,15 +303,43 @@ class TrafficAnalyzer:
         """Print summary statistics for all models"""
         for model_type in self.metrics.keys():
             print(f"\n{self.model_names[model_type]} Model Statistics:")
-            averages = self.metrics[model_type].get_averages()
+            metrics = self.metrics[model_type]
+            if model_type in self.replica_averages:
+                replicas = len(self.replica_averages[model_type]['flow_rate'])
+                for metric, (mean, half_width) in self.get_model_averages(model_type).items():
+                    print(f"Average {metric.replace('_', ' ').title()}: {mean:.3f} "
+                          f"+/- {half_width:.3f} (95% CI, {replicas} replicas)")
+                warmups, counts = np.array(self.replica_warmups[model_type]).T
+                print(f"Steps Used: {counts.mean():.0f} on average (warm-up discarded: "
+                      f"{warmups.min()}-{warmups.max()})")
+                continue
+            averages = metrics.get_averages()
             for metric, value in averages.items():
                 print(f"Average {metric.replace('_', ' ').title()}: {value:.3f}")
+            if metrics.retention is None and metrics.count:
+                _, half_width = metrics.flow_interval()
+                print(f"Flow Rate 95% CI: +/-{half_width:.4f}")
+                print(f"Steps Used: {metrics.count} (warm-up discarded: {metrics.warmup})")
+
+    def print_model_comparison(self, confidence: float = 0.95):
+        """Print the pairwise differences between replicated models"""
+        comparisons = self.compare_models(confidence)
+        if not comparisons:
+            return
+        print(f"\nPairwise Differences ({confidence:.0%} CI, Welch's t-test):")
+        for (first, second), differences in comparisons.items():
+            print(f"\n{self.model_names[first]} - {self.model_names[second]}:")
+            for metric, (difference, half_width) in differences.items():
+                verdict = 'significant' if abs(difference) > half_width else 'not significant'
+                print(f"{metric.replace('_', ' ').title()}: {difference:+.4f} "
+                      f"+/- {half_width:.4f} ({verdict})")
 
     def _calculate_efficiency_metrics(self) -> Dict:
         """Calculate efficiency metrics for all models"""
         metrics = {}
         for model_type in ['basic', 'vdr', 'mvdr']:
-            averages = self.metrics[model_type].get_averages()
+            averages = {metric: mean for metric, (mean, _)
+                        in self.get_model_averages(model_type).items()}
             metrics[model_type] = {
                 'flow_rate': averages['flow_rate'],
                 'density': averages['density'],
@@ -185,50 +401,48 @@ class TrafficAnalyzer:
                 ax.text(bar.get_x() + bar.get_width()/2, height,
                        f'{height:.2f}', ha='center', va='bottom')
 
-    def _prepare_comparison_data(self) -> Tuple[List[str], List[float], List[float], List[float]]:
-        """Prepare data for comparison chart"""
+    def _prepare_comparison_data(self) -> Tuple[List[str], Dict[str, List[float]],
+                                                Dict[str, Optional[List[float]]]]:
+        """Prepare data for comparison chart: values and CI half-widths per model"""
         metrics = ['Flow Rate', 'Density', 'Velocity', 'Jam Frequency']
         model_values = {}
+        model_errors = {}
         
         for model_type in ['basic', 'vdr', 'mvdr']:
-            averages = self.metrics[model_type].get_averages()
-            model_values[model_type] = [
-                averages['flow_rate'],
-                averages['density'],
-                averages['velocity'],
-                averages['jam_frequency']
-            ]
+            averages = self.get_model_averages(model_type)
+            keys = ['flow_rate', 'density', 'velocity', 'jam_frequency']
+            model_values[model_type] = [averages[key][0] for key in keys]
+            # Error bars only for replicated models
+            model_errors[model_type] = ([averages[key][1] for key in keys]
+                                        if model_type in self.replica_averages else None)
         
-        return metrics, model_values['basic'], model_values['vdr'], model_values['mvdr']
+        return metrics, model_values, model_errors
 
-    def _plot_comparison_chart(self, data: Tuple[List[str], List[float], List[float], List[float]], 
+    def _plot_comparison_chart(self, data: Tuple[List[str], Dict[str, List[float]],
+                                                 Dict[str, Optional[List[float]]]],
                              filename: str):
         """Create and save comparison bar chart"""
-        metrics, basic_values, vdr_values, mvdr_values = data
+        metrics, model_values, model_errors = data
         
         plt.figure(figsize=(12, 6))
         x = np.arange(len(metrics))
         width = 0.25  # Narrower bars to fit three models
         
-        # Plot bars for each model
-        plt.bar(x - width, basic_values, width, 
-                label=self.model_names['basic'], color=self.plot_colors['basic'])
-        plt.bar(x, vdr_values, width, 
-                label=self.model_names['vdr'], color=self.plot_colors['vdr'])
-        plt.bar(x + width, mvdr_values, width, 
-                label=self.model_names['mvdr'], color=self.plot_colors['mvdr'])
+        # Plot bars for each model, with confidence intervals when replicated
+        for offset, model_type in zip([-width, 0, width], ['basic', 'vdr', 'mvdr']):
+            values = model_values[model_type]
+            errors = model_errors[model_type]
+            plt.bar(x + offset, values, width, yerr=errors, capsize=4,
+                    label=self.model_names[model_type], color=self.plot_colors[model_type])
+            
+            # Add value labels above the error bars
+            for i, v in enumerate(values):
+                top = v + (errors[i] if errors is not None else 0)
+                plt.text(i + offset, top, f'{v:.3f}', ha='center', va='bottom')
         
         self._setup_plot("Traffic Model Comparison",
                         "Metrics", "Values", x_ticks=(x, metrics))
         
-        # Add value labels
-        for i, v in enumerate(basic_values):
-            plt.text(i - width, v, f'{v:.3f}', ha='center', va='bottom')
-        for i, v in enumerate(vdr_values):
-            plt.text(i, v, f'{v:.3f}', ha='center', va='bottom')
-        for i, v in enumerate(mvdr_values):
-            plt.text(i + width, v, f'{v:.3f}', ha='center', va='bottom')
-        
         plt.savefig(filename, dpi=300, bbox_inches='tight')
         print(f"\nStatistics comparison saved as {filename}")
         plt.close()
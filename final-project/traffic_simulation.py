@@ -1,14 +1,170 @@
-from vehicle_types import VehicleType, VEHICLE_PROPERTIES
+from vehicle_types import VehicleType, VEHICLE_PROPERTIES, VEHICLE_TYPE_CODES
 import numpy as np
 
+def build_vehicle_properties(max_velocity, p_slow, p0_slow):
+    """VDR parameters per vehicle type for the mixed models"""
+    return {
+        VehicleType.CAR: {
+            'max_velocity': max_velocity,
+            'min_velocity': 0,
+            'acceleration': 1.0,
+            'p_slow': p_slow,
+            'p0_slow': p0_slow,
+            'recovery_rate': 0.7,
+            'length': VEHICLE_PROPERTIES[VehicleType.CAR].length
+        },
+        VehicleType.TRUCK: {
+            'max_velocity': max(2, max_velocity - 1),
+            'min_velocity': 0,
+            'acceleration': 0.9,
+            'p_slow': p_slow * 1.15,
+            'p0_slow': p0_slow * 1.1,
+            'recovery_rate': 0.65,
+            'length': VEHICLE_PROPERTIES[VehicleType.TRUCK].length
+        },
+        VehicleType.BUS: {
+            'max_velocity': max(2, max_velocity - 2),
+            'min_velocity': 0,
+            'acceleration': 0.8,
+            'p_slow': p_slow * 1.2,
+            'p0_slow': p0_slow * 1.15,
+            'recovery_rate': 0.6,
+            'length': VEHICLE_PROPERTIES[VehicleType.BUS].length
+        },
+        VehicleType.MOTORCYCLE: {
+            'max_velocity': max_velocity,
+            'min_velocity': 0,
+            'acceleration': 1.0,
+            'p_slow': p_slow * 0.8,
+            'p0_slow': p0_slow * 0.8,
+            'recovery_rate': 0.8,
+            'length': VEHICLE_PROPERTIES[VehicleType.MOTORCYCLE].length
+        }
+    }
+
+# Per-type parameters of the mixed models, kept as one array each
+VEHICLE_PARAMETERS = ('max_velocity', 'acceleration', 'p_slow', 'p0_slow',
+                      'recovery_rate', 'length')
+
+def vehicle_parameter_tables(vehicle_properties):
+    """Per-type parameters as arrays indexed by ``VEHICLE_TYPE_CODES`` position"""
+    props = [vehicle_properties[t] for t in VEHICLE_TYPE_CODES]
+    return {
+        key: np.array([p[key] for p in props], dtype=np.float64)
+        for key in VEHICLE_PARAMETERS
+    }
+
+def vehicle_type_shares(truck_ratio, vehicle_mix=None):
+    """Share of every type code among vehicles; cars take the remainder
+
+    ``vehicle_mix`` maps vehicle types to shares, e.g. ``{VehicleType.BUS:
+    0.05, VehicleType.MOTORCYCLE: 0.1}``, and replaces ``truck_ratio``.
+    """
+    mix = {VehicleType.TRUCK: truck_ratio} if vehicle_mix is None else vehicle_mix
+    shares = np.array([mix.get(t, 0.0) for t in VEHICLE_TYPE_CODES], dtype=np.float64)
+    car = VEHICLE_TYPE_CODES.index(VehicleType.CAR)
+    shares[car] = 1 - (shares.sum() - shares[car])
+    if shares[car] < 0:
+        raise ValueError("Vehicle shares add up to more than 1")
+    return shares
+
+def draw_vehicle_types(draws, shares):
+    """Type code for each uniform draw: the other types first, then cars"""
+    car = VEHICLE_TYPE_CODES.index(VehicleType.CAR)
+    others = np.array([code for code in range(len(shares)) if code != car])
+    index = np.searchsorted(np.cumsum(shares[others]), draws, side='right')
+    return np.where(index < len(others), others[np.minimum(index, len(others) - 1)],
+                    car).astype(np.int8)
+
+def initial_vehicle_types(num_vehicles, shares):
+    """Type codes of ``num_vehicles`` vehicles in the given shares, cars last"""
+    car = VEHICLE_TYPE_CODES.index(VehicleType.CAR)
+    counts = [(code, int(num_vehicles * share)) for code, share in enumerate(shares)
+              if code != car]
+    types = np.concatenate([np.full(count, code, dtype=np.int8) for code, count in counts])
+    return np.concatenate([types, np.full(num_vehicles - len(types), car, dtype=np.int8)])
+
+class VehicleSlots:
+    """Fixed-capacity per-vehicle arrays with a free list of slots.
+
+    Every vehicle owns one slot, an index into all arrays: its ID,
+    position, velocity and type code, and its copy of each of the
+    ``VEHICLE_PARAMETERS``, gathered from the per-type tables when the slot
+    is allocated. Slots of vehicles that leave go back on the free list, so
+    entry and exit are O(1) and the arrays never grow. ``order`` holds the
+    slots of the vehicles on the road in road order. IDs are handed out
+    from a counter and never reused, so they stay valid for tracking.
+    """
+
+    STATE = ('ids', 'positions', 'velocities', 'types')
+
+    def __init__(self, tables, capacity):
+        self.tables = tables
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.positions = np.zeros(capacity, dtype=np.int64)
+        self.velocities = np.zeros(capacity, dtype=np.int64)
+        self.types = np.zeros(capacity, dtype=np.int8)
+        for key in VEHICLE_PARAMETERS:
+            setattr(self, key, np.zeros(capacity, dtype=tables[key].dtype))
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int64)  # Stack, slot 0 on top
+        self.num_free = capacity
+        self.order = np.zeros(0, dtype=np.int64)
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.order)
+
+    def allocate(self, positions, velocities, types):
+        """Take a free slot for each new vehicle and return the slots"""
+        types = np.asarray(types, dtype=np.int8)
+        count = types.size
+        if count > self.num_free:
+            raise RuntimeError("No free vehicle slots left")
+        self.num_free -= count
+        slots = self.free[self.num_free:self.num_free + count][::-1].copy()
+        self.ids[slots] = np.arange(self.next_id, self.next_id + count)
+        self.next_id += count
+        self.positions[slots] = positions
+        self.velocities[slots] = velocities
+        self.types[slots] = types
+        for key in VEHICLE_PARAMETERS:
+            getattr(self, key)[slots] = self.tables[key][types]
+        return slots
+
+    def release(self, slots):
+        """Return the slots of vehicles that left to the free list"""
+        self.free[self.num_free:self.num_free + len(slots)] = slots
+        self.num_free += len(slots)
+
+def occupancy_prefix(occupied):
+    """Prefix sum of occupied cells: ``prefix[i]`` counts cars in cells [0, i)"""
+    prefix = np.zeros(len(occupied) + 1, dtype=np.int64)
+    np.cumsum(occupied, out=prefix[1:])
+    return prefix
+
+def window_densities(prefix, starts, ends):
+    """Density of each window [start, end) from an occupancy prefix sum"""
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    return (prefix[ends] - prefix[starts]) / (ends - starts)
+
+def window_bounds(road_length, window_size):
+    """Start and end cells of consecutive windows covering the road"""
+    starts = np.arange(0, road_length, window_size)
+    return starts, np.minimum(starts + window_size, road_length)
+
 class BaseTrafficSimulation:
-    """Base class for traffic simulation implementing basic NaSch model"""
+    """Base class for traffic simulation implementing basic NaSch model
+    
+    Each simulation draws from its own ``numpy.random.Generator``, created
+    from ``seed`` (an int, ``SeedSequence`` or ``Generator``), and takes all
+    the uniforms of a step in one block call.
+    """
     
     def __init__(self, road_length, num_cars, max_velocity, p_slow,
-                 boundary_type, alpha, beta):
+                 boundary_type, alpha, beta, seed=None):
+        self.rng = np.random.default_rng(seed)
         self.road_length = road_length
-        self.road = [0] * road_length
-        self.velocities = {}
         self.max_velocity = max_velocity
         self.p_slow = p_slow
         self.boundary_type = boundary_type
@@ -16,17 +172,25 @@ class BaseTrafficSimulation:
         self.beta = beta
         
         # Initialize cars
-        if boundary_type == 'closed':
-            positions = np.random.choice(road_length, num_cars, replace=False)
-            for i, pos in enumerate(positions, 1):
-                self.road[pos] = i
-                self.velocities[i] = np.random.randint(0, max_velocity + 1)
-        self.next_car_id = len(self.velocities) + 1
+        self._initialize_cars(num_cars)
+        self._occupancy_prefix = None  # Computed at most once per step
         
         # Track statistics
         self.flow_history = []
         self.density_history = []
 
+    def _initialize_cars(self, num_cars):
+        """Place cars on random cells of a closed road with random velocities"""
+        self.road = [0] * self.road_length
+        self.velocities = {}
+        if self.boundary_type == 'closed':
+            positions = self.rng.choice(self.road_length, num_cars, replace=False)
+            speeds = self.rng.integers(0, self.max_velocity + 1, size=num_cars)
+            for i, (pos, speed) in enumerate(zip(positions, speeds.tolist()), 1):
+                self.road[pos] = i
+                self.velocities[i] = speed
+        self.next_car_id = len(self.velocities) + 1
+
     def get_distance_to_next_car(self, position):
         """Calculate distance to next car ahead"""
         if position >= self.road_length - 1:
@@ -55,31 +219,39 @@ class BaseTrafficSimulation:
         """Get slowdown probability for a car (overridden in VDR model)"""
         return self.p_slow
 
+    def get_occupancy_prefix(self):
+        """Occupancy prefix sum of the current road, computed once per step"""
+        if self._occupancy_prefix is None:
+            self._occupancy_prefix = occupancy_prefix(np.asarray(self.road) != 0)
+        return self._occupancy_prefix
+
+    def get_window_density(self, start, end):
+        """Density over cells [start, end); accepts arrays for many windows"""
+        return window_densities(self.get_occupancy_prefix(), start, end)
+
     def get_density_profile(self, window_size):
         """Calculate density profile along the road"""
-        profile = []
-        for i in range(0, self.road_length, window_size):
-            section = self.road[i:min(i+window_size, self.road_length)]
-            density = sum(1 for x in section if x != 0) / len(section)
-            profile.append(density)
-        return profile
+        return self.get_window_density(*window_bounds(self.road_length, window_size))
 
     def update(self):
         """Update simulation state"""
         new_road = [0] * self.road_length
         new_velocities = {}  # Start with empty dict to avoid stale entries
+        car_positions = [(pos, car_id) for pos, car_id in enumerate(self.road) if car_id != 0]
+        
+        # All uniforms of the step in one call: slowdown and exit per car, then entrance
+        num_cars = len(car_positions)
+        draws = self.rng.random(2 * num_cars + 1).tolist()
         
         # Handle entrance for open boundary
         if self.boundary_type == 'open' and self.road[0] == 0:
-            if np.random.random() < self.alpha:
-                new_car_id = max(self.velocities.keys()) + 1 if self.velocities else 1
-                new_road[0] = new_car_id
-                new_velocities[new_car_id] = 0
+            if draws[-1] < self.alpha:
+                new_road[0] = self.next_car_id
+                new_velocities[self.next_car_id] = 0
+                self.next_car_id += 1
         
         # Update existing cars
-        car_positions = [(pos, car_id) for pos, car_id in enumerate(self.road) if car_id != 0]
-        
-        for pos, car_id in car_positions:
+        for i, (pos, car_id) in enumerate(car_positions):
             if car_id in self.velocities:  # Only process cars we have velocity for
                 v = self.velocities[car_id]
                 d = self.get_distance_to_next_car(pos)
@@ -91,7 +263,7 @@ class BaseTrafficSimulation:
                 v = min(v, d - 1)
                 
                 # Step 3: Randomization
-                if np.random.random() < self.get_slowdown_probability(car_id):
+                if draws[i] < self.get_slowdown_probability(car_id):
                     v = max(0, v - 1)
                 
                 # Step 4: Movement
@@ -99,7 +271,7 @@ class BaseTrafficSimulation:
                 
                 if self.boundary_type == 'open':
                     if new_pos >= self.road_length - 1:
-                        if np.random.random() < self.beta:
+                        if draws[num_cars + i] < self.beta:
                             continue  # Car exits the system
                         else:
                             new_road[pos] = car_id
@@ -114,6 +286,7 @@ class BaseTrafficSimulation:
         
         self.road = new_road
         self.velocities = new_velocities
+        self._occupancy_prefix = None
         
         # Update statistics
         self.update_statistics()
@@ -125,7 +298,7 @@ class BaseTrafficSimulation:
 
     def get_current_density(self):
         """Calculate current traffic density"""
-        return sum(1 for x in self.road if x != 0) / self.road_length
+        return int(self.get_occupancy_prefix()[-1]) / self.road_length
 
     def get_current_flow(self):
         """Calculate current traffic flow"""
@@ -142,9 +315,9 @@ class VDRTrafficSimulation(BaseTrafficSimulation):
     """VDR extension of the traffic simulation"""
     
     def __init__(self, road_length, num_cars, max_velocity, p_slow, p0_slow,
-                 boundary_type, alpha, beta):
+                 boundary_type, alpha, beta, seed=None):
         super().__init__(road_length, num_cars, max_velocity, p_slow,
-                        boundary_type, alpha, beta)
+                        boundary_type, alpha, beta, seed)
         self.p0_slow = p0_slow  # Additional slowdown probability for stopped cars
 
     def get_slowdown_probability(self, car_id):
@@ -153,151 +326,168 @@ class VDRTrafficSimulation(BaseTrafficSimulation):
 
 
 class MixedVDRTrafficSimulation(VDRTrafficSimulation):
+    """Mixed traffic VDR model with per-vehicle parameter arrays.
+    
+    Vehicles are kept in ``slots`` (a ``VehicleSlots`` with one slot per
+    cell), and every rule is evaluated for all of them at once. ``road``,
+    ``velocities`` and ``vehicle_types`` are built from the slots on demand.
+    Any number of vehicle classes can be mixed through ``vehicle_mix``.
+    """
+    
     def __init__(self, road_length: int, num_cars: int, max_velocity: int,
                  p_slow: float, p0_slow: float, boundary_type: str = 'periodic',
                  alpha: float = 0.3, beta: float = 0.3,
-                 truck_ratio: float = 0.15):
+                 truck_ratio: float = 0.15, seed=None, vehicle_mix=None):
         # Initialize parent VDR model first
         super().__init__(road_length, num_cars, max_velocity, p_slow, p0_slow, 
-                        boundary_type, alpha, beta)
+                        boundary_type, alpha, beta, seed)
         
         self.truck_ratio = truck_ratio
-        self.vehicle_types = {}
+        self.type_shares = vehicle_type_shares(truck_ratio, vehicle_mix)
         self.num_vehicles = int(num_cars * 0.7)
         
         # Inherit VDR characteristics and add vehicle-specific modifications
-        self.vehicle_properties = {
-            VehicleType.CAR: {
-                'max_velocity': max_velocity,
-                'min_velocity': 0,
-                'acceleration': 1.0,
-                'p_slow': p_slow,
-                'p0_slow': p0_slow,
-                'recovery_rate': 0.7
-            },
-            VehicleType.TRUCK: {
-                'max_velocity': max(2, max_velocity - 1),
-                'min_velocity': 0,
-                'acceleration': 0.9,
-                'p_slow': p_slow * 1.15,
-                'p0_slow': p0_slow * 1.1,
-                'recovery_rate': 0.65
-            }
-        }
+        self.vehicle_properties = build_vehicle_properties(max_velocity, p_slow, p0_slow)
+        self.type_tables = vehicle_parameter_tables(self.vehicle_properties)
         
         self._initialize_mixed_vehicles()
 
+    def _initialize_cars(self, num_cars):
+        """No single-type cars; ``_initialize_mixed_vehicles`` places the vehicles"""
+
     def _initialize_mixed_vehicles(self):
         """Initialize vehicles with mixed types"""
-        self.road = [0] * self.road_length
-        self.velocities = {}
-        self.vehicle_types = {}
-        
-        num_trucks = int(self.num_vehicles * self.truck_ratio)
-        num_cars = self.num_vehicles - num_trucks
-        
         # Create evenly spaced positions within road length
-        min_spacing = max(3, self.road_length // (self.num_vehicles * 2))
+        min_spacing = max(3, self.road_length // max(1, self.num_vehicles * 2))
         available_positions = list(range(0, self.road_length - min_spacing, min_spacing))
+        self.num_vehicles = min(self.num_vehicles, len(available_positions))
+        self.rng.shuffle(available_positions)
         
-        if len(available_positions) < self.num_vehicles:
-            self.num_vehicles = len(available_positions)
-            num_trucks = int(self.num_vehicles * self.truck_ratio)
-            num_cars = self.num_vehicles - num_trucks
-        
-        np.random.shuffle(available_positions)
-        
-        # Initialize trucks
-        for i in range(num_trucks):
-            vehicle_id = i + 1
-            pos = available_positions[i]
-            self.road[pos] = vehicle_id
-            self.velocities[vehicle_id] = 1  # Start trucks with minimal velocity
-            self.vehicle_types[vehicle_id] = VehicleType.TRUCK
-        
-        # Initialize cars
-        for i in range(num_trucks, self.num_vehicles):
-            vehicle_id = i + 1
-            pos = available_positions[i]
-            self.road[pos] = vehicle_id
-            self.velocities[vehicle_id] = 1  # Start cars with minimal velocity
-            self.vehicle_types[vehicle_id] = VehicleType.CAR
+        # Other classes first, then cars; all start with minimal velocity
+        positions = np.array(available_positions[:self.num_vehicles], dtype=np.int64)
+        types = initial_vehicle_types(self.num_vehicles, self.type_shares)
+        slots = VehicleSlots(self.type_tables, capacity=self.road_length)
+        order = slots.allocate(positions, 1, types)
+        slots.order = order[np.argsort(positions, kind='stable')]
+        self.slots = slots
+        self._occupancy_prefix = None
+
+    @property
+    def road(self):
+        """Car ID per cell; of two vehicles on one cell the later one is shown"""
+        order = self.slots.order
+        road = np.zeros(self.road_length, dtype=np.int64)
+        road[self.slots.positions[order]] = self.slots.ids[order]
+        return road.tolist()
+
+    @property
+    def velocities(self):
+        """Velocity per car ID"""
+        order = self.slots.order
+        return dict(zip(self.slots.ids[order].tolist(), self.slots.velocities[order].tolist()))
+
+    @property
+    def vehicle_types(self):
+        """Vehicle type per car ID"""
+        order = self.slots.order
+        return dict(zip(self.slots.ids[order].tolist(),
+                        [VEHICLE_TYPE_CODES[code] for code in self.slots.types[order].tolist()]))
+
+    @property
+    def cell_types(self):
+        """Type code per cell, built on demand for visualization and logs"""
+        order = self.slots.order
+        cell_types = np.zeros(self.road_length, dtype=np.int8)
+        cell_types[self.slots.positions[order]] = self.slots.types[order]
+        return cell_types
+
+    def vehicle_arrays(self):
+        """Return positions (ascending) and velocities of all vehicles"""
+        order = self.slots.order
+        return self.slots.positions[order], self.slots.velocities[order]
+
+    def get_occupancy_prefix(self):
+        """Occupancy prefix sum of the current road, computed once per step"""
+        if self._occupancy_prefix is None:
+            occupied = np.zeros(self.road_length, dtype=bool)
+            occupied[self.slots.positions[self.slots.order]] = True
+            self._occupancy_prefix = occupancy_prefix(occupied)
+        return self._occupancy_prefix
+
+    def get_current_flow(self):
+        """Calculate current traffic flow"""
+        return int(self.slots.velocities[self.slots.order].sum()) / self.road_length
+
+    def get_distances(self, positions):
+        """``get_distance_to_next_car`` for every vehicle at ascending ``positions``"""
+        closed = self.boundary_type == 'closed'
+        distances = np.empty_like(positions)
+        distances[:-1] = positions[1:] - positions[:-1]
+        if len(positions):
+            # Leading vehicle: wrap to the first one on a closed road
+            first, last = positions[0], positions[-1]
+            if not closed:
+                distances[-1] = self.road_length - last
+            elif first < last:
+                distances[-1] = self.road_length - last + first
+            else:  # Only vehicle on the road
+                distances[-1] = self.road_length
+            distances[positions >= self.road_length - 1] = 1 if closed else self.road_length
+        return distances
 
     def update(self):
         """Update simulation state using VDR rules with vehicle-specific modifications"""
-        new_road = [0] * self.road_length
-        new_velocities = {}
-        new_vehicle_types = {}
+        slots = self.slots
+        order = slots.order
         
-        # Handle entrance (inherit from VDR)
-        if self.boundary_type == 'open' and self.road[0] == 0:
-            if np.random.random() < self.alpha:
-                new_car_id = max(self.velocities.keys()) + 1 if self.velocities else 1
-                new_road[0] = new_car_id
-                vehicle_type = np.random.choice(
-                    [VehicleType.CAR, VehicleType.TRUCK],
-                    p=[1 - self.truck_ratio, self.truck_ratio]
-                )
-                new_velocities[new_car_id] = 0  # Start from stop (VDR rule)
-                new_vehicle_types[new_car_id] = vehicle_type
+        # Of two vehicles that ended up on one cell, only the later one stays
+        positions = slots.positions[order]
+        if len(positions) > 1 and np.any(positions[1:] == positions[:-1]):
+            later = np.append(positions[1:] != positions[:-1], True)
+            slots.release(order[~later])
+            order, positions = order[later], positions[later]
         
-        # Update existing vehicles
-        car_positions = [(pos, car_id) for pos, car_id in enumerate(self.road) if car_id != 0]
+        # All uniforms of the step in one call: three per vehicle
+        # (acceleration, randomization, exit), then entrance and vehicle type
+        n = len(order)
+        uniforms = self.rng.random(3 * n + 2)
+        draws = uniforms[:3 * n].reshape(n, 3).T
+        velocities = slots.velocities[order]
         
-        for pos, car_id in car_positions:
-            if car_id in self.velocities and car_id in self.vehicle_types:
-                vehicle_type = self.vehicle_types[car_id]
-                v = self.velocities[car_id]
-                props = self.vehicle_properties[vehicle_type]
-                
-                # VDR rules with vehicle-specific modifications
-                d = self.get_distance_to_next_car(pos)
-                
-                # Step 1: Acceleration (VDR)
-                if v == 0:
-                    # Apply VDR rules for standing vehicles
-                    if np.random.random() < props['recovery_rate']:
-                        v = 1
-                else:
-                    # Normal acceleration with vehicle-specific rates
-                    v = min(v + props['acceleration'], props['max_velocity'])
-                
-                v = int(v)
-                
-                # Step 2: Distance consideration (VDR)
-                v = min(v, d - 1)
-                
-                # Step 3: Randomization (VDR with vehicle specifics)
-                if v == 0:
-                    # Stopped vehicles (VDR p0_slow)
-                    if np.random.random() < props['p0_slow']:
-                        v = 0
-                else:
-                    # Moving vehicles (VDR p_slow)
-                    if np.random.random() < props['p_slow']:
-                        v = max(0, v - 1)
-                
-                # Step 4: Movement
-                new_pos = pos + v
-                
-                if self.boundary_type == 'open':
-                    if new_pos >= self.road_length - 1:
-                        if np.random.random() < self.beta:
-                            continue
-                        else:
-                            new_road[pos] = car_id
-                            new_velocities[car_id] = v
-                            new_vehicle_types[car_id] = vehicle_type
-                    else:
-                        new_road[new_pos] = car_id
-                        new_velocities[car_id] = v
-                        new_vehicle_types[car_id] = vehicle_type
-                else:
-                    new_pos = new_pos % self.road_length
-                    new_road[new_pos] = car_id
-                    new_velocities[car_id] = v
-                    new_vehicle_types[car_id] = vehicle_type
+        # VDR rules with vehicle-specific modifications
+        d = self.get_distances(positions)
         
-        self.road = new_road
-        self.velocities = new_velocities
-        self.vehicle_types = new_vehicle_types
\ No newline at end of file
+        # Step 1: Acceleration (VDR), standing vehicles recover with their own rate
+        recovered = draws[0] < slots.recovery_rate[order]
+        moving = np.minimum(velocities + slots.acceleration[order], slots.max_velocity[order])
+        v = np.where(velocities == 0, recovered, moving).astype(np.int64)
+        
+        # Step 2: Distance consideration (VDR)
+        v = np.minimum(v, d - 1)
+        
+        # Step 3: Randomization (VDR with vehicle specifics), stopped vehicles stay stopped
+        v = v - ((v > 0) & (draws[1] < slots.p_slow[order]))
+        
+        # Step 4: Movement
+        new_positions = positions + v
+        slots.velocities[order] = v
+        
+        if self.boundary_type == 'open':
+            at_exit = new_positions >= self.road_length - 1
+            slots.positions[order] = np.where(at_exit, positions, new_positions)
+            exits = at_exit & (draws[2] < self.beta)
+            slots.release(order[exits])
+            order = order[~exits]
+        else:
+            slots.positions[order] = new_positions % self.road_length
+        
+        # Back to road order; a wrapped vehicle moves to the front
+        order = order[np.argsort(slots.positions[order], kind='stable')]
+        
+        # Handle entrance (inherit from VDR), new vehicles start from a stop
+        if self.boundary_type == 'open' and not np.any(positions == 0) \
+                and uniforms[-2] < self.alpha:
+            type_code = draw_vehicle_types(uniforms[-1], self.type_shares)
+            order = np.concatenate([slots.allocate(0, 0, type_code), order])
+        slots.order = order
+        self._occupancy_prefix = None
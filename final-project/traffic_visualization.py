@@ -1,52 +1,132 @@
+import time
 import matplotlib.pyplot as plt
-from vehicle_types import VehicleType
+import numpy as np
+from vehicle_types import VEHICLE_PROPERTIES, VEHICLE_TYPE_CODES
 
 class TrafficVisualization:
-    def __init__(self, simulation):
+    """Live view of the road with one scatter artist per vehicle type.
+    
+    The axes, road and legend are drawn once; every frame only moves the
+    scatter offsets and blits them over a cached background, so the cost of
+    a frame no longer grows with the number of vehicles. With ``target_fps``
+    set, frames that arrive faster than the display needs are skipped.
+    """
+    
+    def __init__(self, simulation, target_fps=30):
         self.simulation = simulation
+        self.target_fps = target_fps
         self.fig, self.ax = plt.subplots(figsize=(15, 3))
         plt.ion()
         
+        # Mixed traffic either keeps a type per car ID or a type code per cell
+        self.mixed = hasattr(simulation, 'vehicle_types') or hasattr(simulation, 'cell_types')
+        
         # Add color mapping for vehicle types
         self.vehicle_colors = {
-            VehicleType.CAR: 'blue',
-            VehicleType.TRUCK: 'red'
-        } if hasattr(simulation, 'vehicle_types') else {'default': 'blue'}
-    
-    def update_plot(self, step):
-        self.ax.clear()
+            vehicle_type: VEHICLE_PROPERTIES[vehicle_type].color
+            for vehicle_type in VEHICLE_TYPE_CODES
+        } if self.mixed else {'default': 'blue'}
         
-        # Plot road
-        self.ax.plot([0, self.simulation.road_length], [0, 0], 'k-', linewidth=2)
+        # Static parts of the plot, one line per lane
+        num_lanes = getattr(simulation, 'num_lanes', 1)
+        for lane in range(num_lanes):
+            self.ax.plot([0, self.simulation.road_length], [lane, lane], 'k-', linewidth=2)
+        self.ax.set_xlim(-1, self.simulation.road_length + 1)
+        self.ax.set_ylim(-0.5, num_lanes - 0.5)
+        if num_lanes > 1:
+            self.ax.set_yticks(range(num_lanes))
+            self.ax.set_ylabel('Lane')
         
-        # Plot vehicles
+        # One animated scatter artist per vehicle type
+        self.artists = {}
+        for vehicle_type, color in self.vehicle_colors.items():
+            long = vehicle_type != 'default' and VEHICLE_PROPERTIES[vehicle_type].length > 1
+            label = 'Car' if vehicle_type == 'default' else vehicle_type.value.title()
+            self.artists[vehicle_type] = self.ax.scatter(
+                [], [], s=100 if long else 64, marker='s' if long else 'o',
+                color=color, label=label, animated=True)
+        self.title = self.ax.text(0.5, 1.02, '', transform=self.ax.transAxes,
+                                  ha='center', animated=True)
+        
+        # Add legend for mixed traffic
+        if self.mixed:
+            self.ax.legend(loc='upper right')
+        
+        self._background = None
+        self._last_frame = 0.0
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+    
+    def _on_draw(self, event):
+        """Cache the static background after every full redraw (e.g. resize)"""
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+    
+    def _draw_artists(self):
+        """Render only the animated artists"""
+        for artist in list(self.artists.values()) + [self.title]:
+            self.fig.draw_artist(artist)
+    
+    def _vehicle_groups(self):
+        """Return vehicle (position, lane) offsets grouped by vehicle type"""
+        if hasattr(self.simulation, 'vehicle_arrays'):
+            # Array engines: read positions and type codes without building lists
+            positions, _ = self.simulation.vehicle_arrays()
+            if hasattr(self.simulation, 'vehicle_lanes'):
+                lanes = self.simulation.vehicle_lanes()
+            else:
+                lanes = np.zeros(len(positions), dtype=np.int64)
+            offsets = np.column_stack([positions, lanes])
+            if not hasattr(self.simulation, 'cell_types'):
+                return {'default': offsets}
+            cell_types = self.simulation.cell_types.reshape(-1, self.simulation.road_length)
+            codes = cell_types[lanes, positions]
+            return {vehicle_type: offsets[codes == code]
+                    for code, vehicle_type in enumerate(VEHICLE_TYPE_CODES)}
+        
+        groups = {}
         for pos, vehicle_id in enumerate(self.simulation.road):
             if vehicle_id == 0:  # Empty cell
                 continue
-                
-            if hasattr(self.simulation, 'vehicle_types'):
-                # For mixed traffic simulation
-                vehicle_type = self.simulation.vehicle_types[vehicle_id]
-                color = self.vehicle_colors[vehicle_type]
-                marker = 's' if vehicle_type == VehicleType.TRUCK else 'o'
-                size = 100 if vehicle_type == VehicleType.TRUCK else 80
-            else:
-                # For basic and VDR simulations
-                color = 'blue'
-                marker = 'o'
-                size = 80
-            
-            self.ax.plot(pos, 0, marker, color=color, markersize=size/10)
-        
-        # Set plot properties
-        self.ax.set_xlim(-1, self.simulation.road_length + 1)
-        self.ax.set_ylim(-0.5, 0.5)
-        self.ax.set_title(f'Step {step}')
+            vehicle_type = (self.simulation.vehicle_types[vehicle_id]
+                            if self.mixed else 'default')
+            groups.setdefault(vehicle_type, []).append((pos, 0))
+        return groups
+    
+    def draw(self, step):
+        """Move the vehicle artists to the current state of the road"""
+        groups = self._vehicle_groups()
+        for vehicle_type, artist in self.artists.items():
+            artist.set_offsets(np.asarray(groups.get(vehicle_type, []),
+                                          dtype=float).reshape(-1, 2))
+        self.title.set_text(f'Step {step}')
+    
+    def update_plot(self, step):
+        now = time.perf_counter()
+        if self.target_fps and now - self._last_frame < 1 / self.target_fps:
+            return  # Skip frames the display cannot show anyway
+        self._last_frame = now
         
-        # Add legend for mixed traffic
-        if hasattr(self.simulation, 'vehicle_types'):
-            self.ax.plot([], [], 'bo', label='Car')
-            self.ax.plot([], [], 'rs', label='Truck')
-            self.ax.legend()
+        self.draw(step)
+        canvas = self.fig.canvas
+        if self._background is None:
+            # First frame: show the window, the draw event caches the background
+            plt.pause(0.001)
+            if self._background is None:
+                canvas.draw()
+            return
         
-        plt.pause(0.01)
\ No newline at end of file
+        canvas.restore_region(self._background)
+        self._draw_artists()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+    
+    def save_plot(self, step, filename):
+        """Draw the current state once and save it without any GUI"""
+        self.draw(step)
+        animated = list(self.artists.values()) + [self.title]
+        for artist in animated:
+            artist.set_animated(False)
+        self.fig.savefig(filename, dpi=150, bbox_inches='tight')
+        for artist in animated:
+            artist.set_animated(True)
+        print(f"\nFinal road state saved as {filename}")
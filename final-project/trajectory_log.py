@@ -0,0 +1,318 @@
+"""Chunked binary trajectory logs for offline analysis and replay.
+
+A log starts with a JSON header and is followed by chunks of
+``chunk_size`` steps. Each chunk stores the vehicles of all its steps as
+columns: per-step vehicle counts, positions and IDs as deltas of one byte
+each (the rare larger deltas, e.g. at the start of every step, are patched
+in separately), and velocities and type codes as runs (value, length). The
+reader memory-maps the file and decodes one chunk at a time, and
+``TrajectoryReplay`` steps through a log with the same interface the
+analyzer and visualization use for live simulations.
+"""
+import json
+import mmap
+import struct
+import numpy as np
+from traffic_simulation import window_bounds
+from vehicle_types import VEHICLE_TYPE_CODES
+
+MAGIC = b'TRAJLOG1'
+CHUNK_MAGIC = b'CHNK'
+CHUNK_HEADER = struct.Struct('<4sqI')   # Magic, first step, number of steps
+BLOCK_HEADER = struct.Struct('<3sQ')    # NumPy dtype string, number of elements
+COLUMNS = ['positions', 'velocities', 'types', 'ids']
+
+def narrowest(values, signed=True):
+    """Cast to the smallest integer type that holds every value"""
+    kinds = [np.int8, np.int16, np.int32, np.int64] if signed else \
+        [np.uint8, np.uint16, np.uint32, np.uint64]
+    low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+    for dtype in kinds:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values.astype(kinds[-1])
+
+def delta_encode(values):
+    """Differences of consecutive values as bytes, plus the ones that do not fit"""
+    deltas = np.diff(values, prepend=0)
+    outliers = np.flatnonzero((deltas < -128) | (deltas > 127))
+    if len(outliers) > len(deltas) // 16:
+        # Too many exceptions to patch, store every delta at full width
+        outliers = outliers[:0]
+        packed = narrowest(deltas)
+    else:
+        packed = np.where((deltas < -128) | (deltas > 127), 0, deltas).astype(np.int8)
+    return [packed, narrowest(outliers, signed=False), narrowest(deltas[outliers])]
+
+def delta_decode(deltas, outlier_indices, outlier_values):
+    """Inverse of ``delta_encode``"""
+    deltas = deltas.astype(np.int64)
+    deltas[outlier_indices] = outlier_values
+    return np.cumsum(deltas)
+
+def run_length_encode(values):
+    """Values and lengths of runs of equal consecutive values"""
+    if len(values) == 0:
+        return [values.astype(np.int8), np.zeros(0, dtype=np.uint8)]
+    starts = np.flatnonzero(np.diff(values, prepend=values[0] - 1))
+    lengths = np.diff(np.append(starts, len(values)))
+    return [narrowest(values[starts]), narrowest(lengths, signed=False)]
+
+def run_length_decode(values, lengths):
+    """Inverse of ``run_length_encode``"""
+    return np.repeat(values.astype(np.int64), lengths)
+
+# Encoder, decoder and number of stored blocks per column
+ENCODINGS = {
+    'positions': (delta_encode, delta_decode, 3),
+    'velocities': (run_length_encode, run_length_decode, 2),
+    'types': (run_length_encode, run_length_decode, 2),
+    'ids': (delta_encode, delta_decode, 3)
+}
+BLOCKS_PER_CHUNK = 1 + sum(blocks for _, _, blocks in ENCODINGS.values())
+
+def vehicle_columns(simulation):
+    """Positions (ascending), velocities, type codes and IDs of all vehicles"""
+    if hasattr(simulation, 'vehicle_arrays'):
+        positions, velocities = simulation.vehicle_arrays()
+        types = simulation.cell_types[positions] if hasattr(simulation, 'cell_types') \
+            else np.zeros(len(positions), dtype=np.int8)
+        if getattr(simulation, 'cell_ids', None) is not None:
+            ids = simulation.cell_ids[positions]
+        elif hasattr(simulation, 'road'):
+            ids = np.asarray(simulation.road)[positions]
+        else:  # Compact engine without ID tracking
+            ids = np.zeros(len(positions), dtype=np.int64)
+        return positions, velocities, types, ids
+
+    # Reference models keep car IDs on the road and per-ID dicts
+    road = np.asarray(simulation.road)
+    positions = np.flatnonzero(road)
+    ids = road[positions]
+    velocities = np.array([simulation.velocities[car_id] for car_id in ids], dtype=np.int64)
+    if hasattr(simulation, 'vehicle_types'):
+        types = np.array([VEHICLE_TYPE_CODES.index(simulation.vehicle_types[car_id])
+                          for car_id in ids], dtype=np.int8)
+    else:
+        types = np.zeros(len(positions), dtype=np.int8)
+    return positions, velocities, types, ids
+
+class TrajectoryLogger:
+    """Appends the vehicles of every step to a chunked binary log"""
+
+    def __init__(self, simulation, filename='trajectory.log', chunk_size=256, resume=None):
+        if getattr(simulation, 'num_lanes', 1) > 1:
+            raise ValueError("Trajectory logs can only be recorded on a single lane")
+        self.simulation = simulation
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.step = 0
+        self._buffer = []  # Columns of the steps of the current chunk
+        if resume is not None:
+            # Continue a log from ``resume_state``: drop anything written after it
+            self.file = open(filename, 'r+b')
+            self.file.truncate(resume['offset'])
+            self.file.seek(resume['offset'])
+            self.step = resume['step']
+            self._buffer = list(resume['buffer'])
+            return
+
+        metadata = json.dumps({
+            'road_length': simulation.road_length,
+            'max_velocity': simulation.max_velocity,
+            'boundary_type': getattr(simulation, 'boundary_type', 'closed'),
+            'mixed': hasattr(simulation, 'vehicle_types') or hasattr(simulation, 'cell_types'),
+            'vehicle_types': [vehicle_type.value for vehicle_type in VEHICLE_TYPE_CODES],
+            'chunk_size': chunk_size
+        }).encode()
+        self.file = open(filename, 'wb')
+        self.file.write(MAGIC + struct.pack('<I', len(metadata)) + metadata)
+
+    def attach(self):
+        """Log a step after every call of ``simulation.update()``"""
+        update = self.simulation.update
+
+        def logged_update():
+            update()
+            self.record()
+
+        self.simulation.update = logged_update
+        return self
+
+    def record(self):
+        """Buffer the current step and write the chunk once it is full"""
+        self._buffer.append(vehicle_columns(self.simulation))
+        self.step += 1
+        if len(self._buffer) == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered steps as one chunk"""
+        if not self._buffer:
+            return
+        first_step = self.step - len(self._buffer)
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, first_step, len(self._buffer)))
+
+        counts = narrowest(np.array([len(step[0]) for step in self._buffer]), signed=False)
+        blocks = [counts]
+        for i, column in enumerate(COLUMNS):
+            values = np.concatenate([np.asarray(step[i], dtype=np.int64)
+                                     for step in self._buffer])
+            blocks.extend(ENCODINGS[column][0](values))
+        for block in blocks:
+            self.file.write(BLOCK_HEADER.pack(block.dtype.str.encode(), len(block)))
+            self.file.write(np.ascontiguousarray(block).tobytes())
+        self._buffer = []
+
+    def resume_state(self):
+        """File size, step count and buffered steps, to continue the log later"""
+        self.file.flush()
+        return {'offset': self.file.tell(), 'step': self.step, 'buffer': list(self._buffer)}
+
+    def close(self):
+        """Write the last partial chunk and close the file"""
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TrajectoryReader:
+    """Random access to the steps of a trajectory log through a memory map"""
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{filename} is not a trajectory log")
+        offset = len(MAGIC)
+        (length,) = struct.unpack_from('<I', self._map, offset)
+        offset += 4
+        self.metadata = json.loads(self._map[offset:offset + length])
+        self.road_length = self.metadata['road_length']
+        offset += length
+
+        # Index of (first step, number of steps, file offset) per chunk
+        self.chunks = []
+        while offset < len(self._map):
+            magic, first_step, num_steps = CHUNK_HEADER.unpack_from(self._map, offset)
+            if magic != CHUNK_MAGIC:
+                raise ValueError(f"Corrupt chunk at byte {offset} of {filename}")
+            self.chunks.append((first_step, num_steps, offset))
+            offset = self._read_blocks(offset + CHUNK_HEADER.size)[1]
+        self.num_steps = sum(num_steps for _, num_steps, _ in self.chunks)
+        self._cached = (None, None)
+
+    def _read_blocks(self, offset):
+        """Zero-copy views of the blocks of one chunk and the offset after them"""
+        blocks = []
+        for _ in range(BLOCKS_PER_CHUNK):
+            dtype, count = BLOCK_HEADER.unpack_from(self._map, offset)
+            offset += BLOCK_HEADER.size
+            dtype = np.dtype(dtype.decode())
+            blocks.append(np.frombuffer(self._map, dtype=dtype, count=count, offset=offset))
+            offset += count * dtype.itemsize
+        return blocks, offset
+
+    def read_chunk(self, index):
+        """Decode chunk ``index`` into per-step offsets and full columns"""
+        if self._cached[0] == index:
+            return self._cached[1]
+        _, _, offset = self.chunks[index]
+        blocks, _ = self._read_blocks(offset + CHUNK_HEADER.size)
+        counts, blocks = blocks[0], blocks[1:]
+        chunk = {'offsets': np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])}
+        for column in COLUMNS:
+            _, decode, count = ENCODINGS[column]
+            chunk[column], blocks = decode(*blocks[:count]), blocks[count:]
+        self._cached = (index, chunk)
+        return chunk
+
+    def __len__(self):
+        return self.num_steps
+
+    def __getitem__(self, step):
+        """Positions, velocities, type codes and IDs of the vehicles at ``step``"""
+        if not 0 <= step < self.num_steps:
+            raise IndexError(step)
+        index = np.searchsorted([first for first, _, _ in self.chunks], step, 'right') - 1
+        chunk = self.read_chunk(index)
+        i = step - self.chunks[index][0]
+        start, end = chunk['offsets'][i], chunk['offsets'][i + 1]
+        return tuple(chunk[column][start:end] for column in COLUMNS)
+
+    def close(self):
+        """Release the memory map"""
+        self._cached = (None, None)
+        self._map.close()
+
+class TrajectoryReplay:
+    """Plays a trajectory log back with the interface of an array engine
+
+    Every ``update()`` loads the next logged step, so a past run can be fed
+    to ``TrafficAnalyzer.collect_metrics`` or ``TrafficVisualization``
+    without re-simulating it.
+    """
+
+    def __init__(self, filename):
+        self.log = TrajectoryReader(filename)
+        metadata = self.log.metadata
+        self.road_length = metadata['road_length']
+        self.max_velocity = metadata['max_velocity']
+        self.boundary_type = metadata['boundary_type']
+        if metadata['mixed']:
+            self.cell_types = np.zeros(self.road_length, dtype=np.int8)
+        self.step = -1
+        self.positions = np.zeros(0, dtype=np.int64)
+        self.speeds = np.zeros(0, dtype=np.int64)
+        self.car_ids = np.zeros(0, dtype=np.int64)
+
+        # Track statistics
+        self.flow_history = []
+        self.density_history = []
+
+    def update(self):
+        """Advance to the next logged step"""
+        self.step += 1
+        self.positions, self.speeds, types, self.car_ids = self.log[self.step]
+        if hasattr(self, 'cell_types'):
+            self.cell_types[self.positions] = types
+        self.update_statistics()
+
+    def vehicle_arrays(self):
+        """Return positions (ascending) and velocities of all vehicles"""
+        return self.positions, self.speeds
+
+    def get_window_density(self, start, end):
+        """Density over cells [start, end) by binary search in the sorted positions"""
+        counts = np.searchsorted(self.positions, end) - np.searchsorted(self.positions, start)
+        return counts / (np.asarray(end) - np.asarray(start))
+
+    def get_density_profile(self, window_size):
+        """Calculate density profile along the road"""
+        return self.get_window_density(*window_bounds(self.road_length, window_size))
+
+    def update_statistics(self):
+        """Update flow and density history"""
+        self.flow_history.append(self.get_current_flow())
+        self.density_history.append(self.get_current_density())
+
+    def get_current_density(self):
+        """Calculate current traffic density"""
+        return len(self.positions) / self.road_length
+
+    def get_current_flow(self):
+        """Calculate current traffic flow"""
+        return int(self.speeds.sum()) / self.road_length
+
+def replay_into_analyzer(filename, analyzer, model_type):
+    """Feed every step of a trajectory log to ``analyzer.collect_metrics``"""
+    replay = TrajectoryReplay(filename)
+    for step in range(len(replay.log)):
+        replay.update()
+        analyzer.collect_metrics(replay, model_type, step)
+    return replay
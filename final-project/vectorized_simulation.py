@@ -0,0 +1,166 @@
+import numpy as np
+from traffic_simulation import occupancy_prefix, window_bounds, window_densities
+
+class VectorizedTrafficSimulation:
+    """NaSch model with whole-array update steps.
+
+    The road is stored as two integer arrays, ``road`` (car ID per cell,
+    0 for empty) and ``road_velocities`` (velocity per cell). Every rule of
+    the model is applied to all cars at once, so the cost of a step is a
+    handful of NumPy operations instead of a Python loop over the road.
+    The ``road``/``velocities``/``get_state()`` surface matches
+    ``BaseTrafficSimulation`` so the analyzer and visualization work as-is.
+    """
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow,
+                 boundary_type, alpha, beta, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.road_length = road_length
+        self.road = np.zeros(road_length, dtype=np.int64)
+        self.road_velocities = np.zeros(road_length, dtype=np.int64)
+        self.max_velocity = max_velocity
+        self.p_slow = p_slow
+        self.boundary_type = boundary_type
+        self.alpha = alpha
+        self.beta = beta
+
+        # Initialize cars
+        if boundary_type == 'closed':
+            positions = self.rng.choice(road_length, num_cars, replace=False)
+            self.road[positions] = np.arange(1, num_cars + 1)
+            self.road_velocities[positions] = self.rng.integers(
+                0, max_velocity + 1, size=num_cars)
+        self.next_car_id = int(self.road.max()) + 1
+        self._occupancy_prefix = None  # Computed at most once per step
+
+        # Track statistics
+        self.flow_history = []
+        self.density_history = []
+
+    @property
+    def velocities(self):
+        """Velocity per car ID, mirroring ``BaseTrafficSimulation.velocities``"""
+        positions, velocities = self.vehicle_arrays()
+        return dict(zip(self.road[positions].tolist(), velocities.tolist()))
+
+    def vehicle_arrays(self):
+        """Return positions (ascending) and velocities of all cars"""
+        positions = np.flatnonzero(self.road)
+        return positions, self.road_velocities[positions]
+
+    def get_gaps(self, positions):
+        """Number of empty cells in front of each car"""
+        gaps = np.empty_like(positions)
+        if len(positions) == 0:
+            return gaps
+        gaps[:-1] = positions[1:] - positions[:-1] - 1
+
+        if self.boundary_type == 'open':
+            # Leading car only sees the end of the road
+            last = positions[-1]
+            gaps[-1] = self.road_length - last - 1 if last < self.road_length - 1 \
+                else self.road_length - 1
+        else:  # periodic boundary
+            gaps[-1] = (positions[0] - positions[-1] - 1) % self.road_length
+        return gaps
+
+    def get_slowdown_probabilities(self, velocities):
+        """Slowdown probability per car (overridden in VDR model)"""
+        return np.full(len(velocities), self.p_slow)
+
+    def get_occupancy_prefix(self):
+        """Occupancy prefix sum of the current road, computed once per step"""
+        if self._occupancy_prefix is None:
+            self._occupancy_prefix = occupancy_prefix(self.road != 0)
+        return self._occupancy_prefix
+
+    def get_window_density(self, start, end):
+        """Density over cells [start, end); accepts arrays for many windows"""
+        return window_densities(self.get_occupancy_prefix(), start, end)
+
+    def get_density_profile(self, window_size):
+        """Calculate density profile along the road"""
+        return self.get_window_density(*window_bounds(self.road_length, window_size))
+
+    def update(self):
+        """Update simulation state"""
+        positions, v = self.vehicle_arrays()
+        car_ids = self.road[positions]
+        gaps = self.get_gaps(positions)
+
+        # All uniforms of the step in one call: slowdown and exit per car, then entrance
+        draws = self.rng.random(2 * len(v) + 1)
+
+        # Step 1: Acceleration
+        v = np.minimum(v + 1, self.max_velocity)
+
+        # Step 2: Deceleration
+        v = np.minimum(v, gaps)
+
+        # Step 3: Randomization (uses the velocities of the previous step)
+        slow_down = draws[:len(v)] < \
+            self.get_slowdown_probabilities(self.road_velocities[positions])
+        v = np.maximum(0, v - slow_down)
+
+        # Step 4: Movement
+        new_positions = positions + v
+
+        if self.boundary_type == 'open':
+            at_exit = new_positions >= self.road_length - 1
+            leaves = at_exit & (draws[len(v):-1] < self.beta)
+            # Cars that reach the exit but do not leave stay where they are
+            new_positions = np.where(at_exit, positions, new_positions)
+            keep = ~leaves
+            new_positions, car_ids, v = new_positions[keep], car_ids[keep], v[keep]
+        else:  # periodic boundary
+            new_positions %= self.road_length
+
+        new_road = np.zeros(self.road_length, dtype=np.int64)
+        new_velocities = np.zeros(self.road_length, dtype=np.int64)
+        new_road[new_positions] = car_ids
+        new_velocities[new_positions] = v
+
+        # Handle entrance for open boundary
+        if self.boundary_type == 'open' and self.road[0] == 0:
+            if draws[-1] < self.alpha:
+                new_road[0] = self.next_car_id
+                new_velocities[0] = 0
+                self.next_car_id += 1
+
+        self.road = new_road
+        self.road_velocities = new_velocities
+        self._occupancy_prefix = None
+
+        # Update statistics
+        self.update_statistics()
+
+    def update_statistics(self):
+        """Update flow and density history"""
+        self.flow_history.append(self.get_current_flow())
+        self.density_history.append(self.get_current_density())
+
+    def get_current_density(self):
+        """Calculate current traffic density"""
+        return np.count_nonzero(self.road) / self.road_length
+
+    def get_current_flow(self):
+        """Calculate current traffic flow"""
+        return int(self.road_velocities.sum()) / self.road_length
+
+    def get_state(self):
+        """Return current state of the simulation"""
+        return self.road, self.velocities
+
+
+class VectorizedVDRTrafficSimulation(VectorizedTrafficSimulation):
+    """VDR extension of the vectorized traffic simulation"""
+
+    def __init__(self, road_length, num_cars, max_velocity, p_slow, p0_slow,
+                 boundary_type, alpha, beta, seed=None):
+        super().__init__(road_length, num_cars, max_velocity, p_slow,
+                        boundary_type, alpha, beta, seed)
+        self.p0_slow = p0_slow  # Additional slowdown probability for stopped cars
+
+    def get_slowdown_probabilities(self, velocities):
+        """Override to implement VDR behavior"""
+        return np.where(velocities == 0, self.p0_slow, self.p_slow)
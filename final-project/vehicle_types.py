@@ -5,6 +5,8 @@ class VehicleType(Enum):
     """Enum for different vehicle types"""
     CAR = 'car'
     TRUCK = 'truck'
+    BUS = 'bus'
+    MOTORCYCLE = 'motorcycle'
 
 @dataclass
 class VehicleProperties:
@@ -14,6 +16,10 @@ class VehicleProperties:
     length: int
     color: str
 
+# Stable integer code of each vehicle type, used by the array engines
+VEHICLE_TYPE_CODES = [VehicleType.CAR, VehicleType.TRUCK, VehicleType.BUS,
+                      VehicleType.MOTORCYCLE]
+
 # Define properties for each vehicle type
 VEHICLE_PROPERTIES = {
     VehicleType.CAR: VehicleProperties(
@@ -27,5 +33,17 @@ VEHICLE_PROPERTIES = {
         acceleration=0.9,
         length=2,
         color='red'
+    ),
+    VehicleType.BUS: VehicleProperties(
+        max_velocity=3,
+        acceleration=0.8,
+        length=3,
+        color='green'
+    ),
+    VehicleType.MOTORCYCLE: VehicleProperties(
+        max_velocity=5,
+        acceleration=1.0,
+        length=1,
+        color='orange'
     )
 }
\ No newline at end of file
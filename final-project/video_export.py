@@ -0,0 +1,124 @@
+"""Offline GIF/MP4 export of runs recorded with ``SpaceTimeRecorder``.
+
+Frames are rendered by a pool of worker processes with the Agg backend.
+Each worker opens the recording read-only, draws the static road once and
+only blits the moving vehicles for every frame it owns, writing PNG files
+that are stitched into a GIF with Pillow or an MP4 with ffmpeg. For GIFs the
+workers also reduce each frame to a palette, so the serial stitching step
+does not have to quantize anything.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from PIL import Image
+from space_time import load_space_time
+
+FRAME_PATTERN = 'frame_%06d.png'
+
+def find_ffmpeg():
+    """Path of the ffmpeg binary configured for matplotlib, or None"""
+    return shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+
+def render_frames(filename, road_length, max_velocity, steps, first_frame, frame_dir,
+                  palette=False):
+    """Render the recorded ``steps`` as consecutive PNG frames"""
+    data = load_space_time(filename, road_length)
+    fig, ax = plt.subplots(figsize=(12, 1.5), dpi=100)
+    ax.plot([0, road_length], [0, 0], 'k-', linewidth=1)
+    ax.set_xlim(-1, road_length + 1)
+    ax.set_ylim(-0.5, 0.5)
+    ax.set_yticks([])
+    vehicles = ax.scatter([], [], c=[], s=16, cmap='viridis_r', vmin=0,
+                          vmax=max_velocity, animated=True)
+    label = ax.text(0.01, 0.8, '', transform=ax.transAxes, animated=True)
+
+    # Static background, drawn once per worker
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+
+    for frame, step in enumerate(steps, start=first_frame):
+        row = np.asarray(data[step])
+        positions = np.flatnonzero(row >= 0)
+        vehicles.set_offsets(np.column_stack([positions, np.zeros(len(positions))]))
+        vehicles.set_array(row[positions])
+        label.set_text(f'Step {step}')
+
+        fig.canvas.restore_region(background)
+        ax.draw_artist(vehicles)
+        ax.draw_artist(label)
+        image = Image.fromarray(np.asarray(fig.canvas.buffer_rgba())[..., :3])
+        if palette:
+            image = image.quantize(64, method=Image.Quantize.FASTOCTREE,
+                                   dither=Image.Dither.NONE)
+        image.save(os.path.join(frame_dir, FRAME_PATTERN % frame), compress_level=1)
+    plt.close(fig)
+    return len(steps)
+
+def stitch_frames(frame_dir, num_frames, output, fps):
+    """Encode the PNG frames as a GIF (Pillow) or MP4 (ffmpeg)"""
+    paths = [os.path.join(frame_dir, FRAME_PATTERN % i) for i in range(num_frames)]
+    if output.endswith('.gif'):
+        first = Image.open(paths[0])
+        first.save(output, save_all=True, append_images=(Image.open(p) for p in paths[1:]),
+                   duration=int(1000 / fps), loop=0)
+        return
+
+    subprocess.run([find_ffmpeg(), '-y', '-loglevel', 'error', '-framerate', str(fps),
+                    '-i', os.path.join(frame_dir, FRAME_PATTERN),
+                    '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p',
+                    output], check=True)
+
+def export_video(filename, road_length, output='traffic.gif', fps=30, every=1,
+                 max_velocity=None, workers=None):
+    """Render a recorded run in parallel and stitch it into ``output``"""
+    gif = output.endswith('.gif')
+    if not gif and find_ffmpeg() is None:
+        raise RuntimeError("ffmpeg is not available; export a .gif instead")
+
+    # np.memmap cannot map an empty file and there would be nothing to render
+    if os.path.getsize(filename) == 0:
+        raise ValueError(f"{filename}: recording contains no steps")
+    data = load_space_time(filename, road_length)
+    steps = np.arange(0, len(data), every)
+    if max_velocity is None:
+        max_velocity = int(data.max())
+
+    # A few contiguous chunks per worker keep the pool busy until the end
+    num_chunks = min(len(steps), 4 * (workers or os.cpu_count() or 1))
+    chunks = np.array_split(steps, num_chunks)
+    starts = np.cumsum([0] + [len(chunk) for chunk in chunks[:-1]])
+
+    with tempfile.TemporaryDirectory() as frame_dir:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_frames, filename, road_length, max_velocity,
+                                   chunk, int(start), frame_dir, gif)
+                       for chunk, start in zip(chunks, starts)]
+            num_frames = sum(future.result() for future in futures)
+        stitch_frames(frame_dir, num_frames, output, fps)
+    print(f"\nVideo with {num_frames} frames saved as {output}")
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Export a recorded run as GIF or MP4")
+    parser.add_argument('recording', help="File written by --space-time-file")
+    parser.add_argument('--road-length', type=int, required=True)
+    parser.add_argument('--output', default='traffic.gif',
+                        help="Output file; .gif uses Pillow, anything else ffmpeg")
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--every', type=int, default=1, help="Render every n-th step")
+    parser.add_argument('--v-max', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    export_video(args.recording, args.road_length, args.output, args.fps,
+                 args.every, args.v_max, args.workers)
+
+if __name__ == "__main__":
+    main()